@@ -1,11 +1,23 @@
 from abc import ABC, abstractmethod
 import undetected_chromedriver as uc
+from selenium.webdriver.common.by import By
 from bs4 import BeautifulSoup
-import time
 import json
+import settings
+from http_client import HttpClient
+from detail_parser import DetailPage
+from transfer_resolver import TransferResolver
+from browser import (
+    inject_cookies, parse_cookie_string, apply_scraping_options, apply_scraping_profile, wait_for_url_change
+)
+from selenium.common.exceptions import TimeoutException
 
 class BaseSpider(ABC):
     """基础爬虫类"""
+    cookie = None
+    http_client = None
+    transfer_resolver = None
+
     def __init__(self, site_config):
         self.name = site_config.get('name', '未命名站点')
         self.base_url = site_config.get('base_url', '')
@@ -22,48 +34,113 @@ class BaseSpider(ABC):
         except:
             return None
     
+    def get_http_client(self):
+        """获取复用连接的HTTP客户端"""
+        if self.http_client is None:
+            self.http_client = HttpClient(cookie=self.cookie, domain=self.cookie_domain())
+        return self.http_client
+    
+    def get_transfer_resolver(self):
+        """获取中转页解析器, 与列表/详情页共用连接池"""
+        if self.transfer_resolver is None:
+            self.transfer_resolver = TransferResolver(client=self.get_http_client())
+        return self.transfer_resolver
+    
+    def resolve_transfer_urls(self, transfer_urls):
+        """获取多个中转页对应的网盘地址, 按输入顺序返回
+
+        HTTP解析按 SPIDER_CONFIG['parallel_pans'] 并发进行, 解析失败的中转页再逐个用浏览器获取。
+        """
+        resolver = self.get_transfer_resolver()
+        if settings.SPIDER_CONFIG['parallel_pans']:
+            infos = resolver.resolve_all(transfer_urls)
+        else:
+            infos = [resolver.resolve(transfer_url) for transfer_url in transfer_urls]
+        
+        urls = []
+        for i, (transfer_url, info) in enumerate(zip(transfer_urls, infos)):
+            if info:
+                urls.append(info['下载链接'])
+                continue
+            try:
+                self.driver.get(transfer_url)
+                if not self.wait_for_redirect(transfer_url) and self.cookie and self.is_logged_out(transfer_url):
+                    # 登录失效, 重新注入Cookie后再试一次
+                    self.set_cookies()
+                    self.driver.refresh()
+                    self.wait_for_redirect(transfer_url)
+                urls.append(self.driver.current_url)
+            except Exception as e:
+                print(f"获取第{i+1}个下载链接失败: {e}")
+                urls.append('')
+        return urls
+    
+    def fetch_detail_page(self, url):
+        """通过HTTP获取并解析详情页, 校验失败返回None"""
+        try:
+            response = self.get_http_client().get(url)
+            if response.status_code != 200:
+                print(f"获取详情页失败，状态码: {response.status_code}")
+                return None
+            page = DetailPage(response.text, url, self.config.get('selectors'))
+            if page.is_valid():
+                return page
+            print(f"详情页解析校验失败，改用浏览器: {url}")
+        except Exception as e:
+            print(f"HTTP获取详情页失败: {e}")
+        return None
+    
     def init_driver(self):
         """初始化浏览器"""
         options = uc.ChromeOptions()
         options.add_argument('--window-size=1920,1080')
+        if settings.BROWSER_CONFIG['scraping_profile']:
+            apply_scraping_options(options)
         self.driver = uc.Chrome(options=options)
+        apply_scraping_profile(self.driver, self.base_url.split('//')[1].split('/')[0])
         return self.set_cookies()
     
     def set_cookies(self):
-        """设置Cookie"""
+        """设置Cookie
+
+        浏览器在爬虫的整个生命周期内复用, Cookie只在创建时注入一次,
+        之后仅在检测到登录失效时重新注入, 不需要打开首页再刷新。
+        """
         if not self.cookie:
             return True
             
         try:
-            self.driver.get(self.base_url)
-            time.sleep(2)
-            
-            # 设置Cookie
-            for cookie in self.parse_cookies(self.cookie):
-                self.driver.add_cookie(cookie)
-            
-            self.driver.refresh()
+            inject_cookies(self.driver, self.cookie, self.cookie_domain())
             return True
         except Exception as e:
             print(f"设置Cookie失败: {e}")
             return False
     
+    def wait_for_redirect(self, transfer_url):
+        """等待中转页跳转到网盘, 超时返回False"""
+        try:
+            wait_for_url_change(self.driver, transfer_url, settings.BROWSER_CONFIG['redirect_timeout'])
+            return True
+        except TimeoutException:
+            return False
+    
+    def is_logged_out(self, transfer_url):
+        """停留在中转页且没有下载按钮, 通常是登录失效"""
+        return (
+            self.driver.current_url == transfer_url
+            and not self.driver.find_elements(By.CSS_SELECTOR, "#download-page a.empty.button")
+        )
+    
+    def cookie_domain(self):
+        """Cookie所属域名, 包含子域名"""
+        return f".{self.base_url.split('//')[1].split('/')[0]}"
+    
     def parse_cookies(self, cookie_string):
         """解析Cookie字符串"""
-        cookies = []
-        for item in cookie_string.split(';'):
-            if '=' in item:
-                name, value = item.strip().split('=', 1)
-                cookies.append({
-                    'name': name,
-                    'value': value,
-                    'domain': f".{self.base_url.split('//')[1].split('/')[0]}",
-                    'path': '/'
-                })
-        return cookies
+        return parse_cookie_string(cookie_string, self.cookie_domain())
     
     @abstractmethod
-    def get_game_list(self, start_page=1, end_page=10):
+    def get_game_list(self, start_page=1, end_page=10, existing_games=None):
         """获取游戏列表"""
         pass
     
@@ -73,7 +150,7 @@ class BaseSpider(ABC):
         pass
     
     @abstractmethod
-    def extract_download_info(self, url):
+    def extract_download_info(self, url, button_count=None):
         """提取下载信息"""
         pass
     
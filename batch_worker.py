@@ -1,71 +1,153 @@
 from PyQt5.QtCore import QThread, pyqtSignal
 from netdisk import NetDisk
 from workers.info_worker import InfoWorker
-import time
-import random
+from checkpoint import CheckpointJournal
+from queue import Queue, Full
+import hashlib
+import threading
 import settings
 from errors import *
 
 class BatchWorker(QThread):
-    """批量采集线程"""
+    """批量采集线程
+
+    游戏放入有界队列, 由多个采集线程并发消费; HTTP步骤按 max_workers 并发,
+    回退到浏览器的步骤另由信号量限制为浏览器池大小, 多出的线程排队而不是租用超时。
+    每个游戏采集完成即发出 game_found, 没有取得下载信息的计为失败。
+    完整的结果写入断点日志, 中断后重新运行同一批游戏会跳过已采集的游戏并重放其结果。
+    """
     progress = pyqtSignal(str)  # 进度信号
+    game_found = pyqtSignal(dict)  # 单个游戏采集完成信号
     finished = pyqtSignal(list) # 完成信号,返回采集结果
     error = pyqtSignal(str)     # 错误信号
-    
-    def __init__(self, games, cookie=None):
+
+    def __init__(self, games, cookie=None, max_workers=None, journal=None):
         super().__init__()
         self.games = games
         self.cookie = cookie
+        self.max_workers = max_workers or settings.SPIDER_CONFIG['max_workers']
         self.results = []
         self.is_running = True
         self.failed_count = 0
-        
+        self.done_count = 0
+        self.lock = threading.Lock()
+        self.browser_slots = threading.BoundedSemaphore(settings.BROWSER_CONFIG['pool_size'])
+        self.journal = journal or CheckpointJournal(self.journal_name(games))
+
+    @staticmethod
+    def journal_name(games):
+        """断点日志名称, 由这批游戏的ID决定, 不同批次互不影响, 与顺序无关"""
+        ids = sorted(str(game['id']) for game in games)
+        digest = hashlib.sha1('\n'.join(ids).encode('utf-8')).hexdigest()[:16]
+        return f'batch_worker_{digest}'
+
     def run(self):
         try:
-            total = len(self.games)
-            self.progress.emit(f"开始批量采集 {total} 个游戏")
+            # 重放上次中断前已采集的结果
+            collected = self.journal.load()
+            games = [game for game in self.games if str(game['id']) not in collected]
+            for game in self.games:
+                result = collected.get(str(game['id']))
+                if result:
+                    self.results.append(result)
+                    self.game_found.emit(result)
+            if collected:
+                self.progress.emit(f"从断点恢复 {len(self.results)} 个已采集游戏")
             
-            for i, game in enumerate(self.games, 1):
-                if not self.is_running:
-                    break
-                    
-                if self.failed_count >= settings.SPIDER_CONFIG['max_failed']:
-                    raise SpiderError("失败次数过多,停止采集")
-                    
-                try:
-                    self.progress.emit(f"\n采集第 {i}/{total} 个游戏")
-                    result = self.collect_game(game)
-                    if result:
-                        self.results.append(result)
-                except Exception as e:
-                    self.failed_count += 1
-                    self.error.emit(f"采集游戏失败: {str(e)}")
-                    continue
-                    
-                # 随机延迟
-                delay = settings.SPIDER_CONFIG['delay']
-                time.sleep(random.uniform(*delay))
-                
+            total = len(games)
+            self.progress.emit(f"开始批量采集 {total} 个游戏")
+
+            queue = Queue(maxsize=settings.SPIDER_CONFIG['batch_size'])
+            workers = [
+                threading.Thread(target=self.consume, args=(queue, total), daemon=True)
+                for _ in range(max(1, min(self.max_workers, total)))
+            ]
+            for worker in workers:
+                worker.start()
+
+            try:
+                for game in games:
+                    if not self.put(queue, game):
+                        break
+            finally:
+                # 每个采集线程一个结束标记
+                for _ in workers:
+                    queue.put(None)
+                for worker in workers:
+                    worker.join()
+
+            if self.failed_count >= settings.SPIDER_CONFIG['max_failed']:
+                raise SpiderError("失败次数过多,停止采集")
+
+            if self.is_running:
+                self.journal.clear()
             self.finished.emit(self.results)
-            
+
         except Exception as e:
             self.error.emit(f"批量采集失败: {str(e)}")
-            
+
+    def put(self, queue, game):
+        """放入队列, 队列满时等待; 已停止或失败过多时返回False"""
+        while self.should_continue():
+            try:
+                queue.put(game, timeout=0.5)
+                return True
+            except Full:
+                continue
+        return False
+
+    def should_continue(self):
+        """是否继续采集"""
+        return self.is_running and self.failed_count < settings.SPIDER_CONFIG['max_failed']
+
+    def consume(self, queue, total):
+        """采集线程: 从队列取游戏采集, 直到收到结束标记"""
+        while True:
+            game = queue.get()
+            if game is None:
+                break
+            if not self.should_continue():
+                continue
+
+            try:
+                result, complete = self.collect_game(game)
+                # 没有下载信息的不写入断点, 恢复时重新采集
+                if result and complete:
+                    self.journal.append(game['id'], result)
+                with self.lock:
+                    self.done_count += 1
+                    done = self.done_count
+                    if result:
+                        self.results.append(result)
+                    if not complete:
+                        self.failed_count += 1
+                self.progress.emit(f"\n已采集 {done}/{total} 个游戏")
+                if not complete:
+                    self.error.emit(f"获取下载信息失败: {game['url']}")
+                if result:
+                    self.game_found.emit(result)
+            except Exception as e:
+                with self.lock:
+                    self.failed_count += 1
+                self.error.emit(f"采集游戏失败: {str(e)}")
+
     def collect_game(self, game):
-        """采集单个游戏"""
+        """采集单个游戏, 返回 (结果, 是否取得下载信息)"""
         # 采集基本信息
         info_worker = InfoWorker(game['url'])
         info_worker.run()
         result = info_worker.collect_info()
-        
-        # 采集下载信息
+
+        # 采集下载信息, 浏览器不足时等待名额
         netdisk = NetDisk()
-        download_info = netdisk.get_download_info(game['url'], self.cookie)
+        download_info = netdisk.get_download_info(game['url'], self.cookie, self.browser_slots)
         if download_info:
             result.update(download_info)
-            
-        return result
-    
+        if result:
+            result.setdefault('id', game['id'])
+
+        return result, download_info is not None
+
     def stop(self):
         """停止采集"""
-        self.is_running = False 
\ No newline at end of file
+        self.is_running = False
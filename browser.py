@@ -1,26 +1,163 @@
-from queue import Queue
 import undetected_chromedriver as uc
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.common.by import By
+from selenium.common.exceptions import TimeoutException
 import threading
 import time
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from webdriver_manager.chrome import ChromeDriverManager
+import settings
+from errors import BrowserError
+from http_client import parse_cookie_string
+
+# 进程内只解析一次 chromedriver 路径, ChromeDriverManager().install() 每次都会检查版本
+_driver_path = None
+_driver_path_lock = threading.Lock()
+
+def get_driver_path():
+    """获取 chromedriver 路径, 首次调用时下载或查找"""
+    global _driver_path
+    with _driver_path_lock:
+        if _driver_path is None:
+            _driver_path = ChromeDriverManager().install()
+        return _driver_path
+
+def inject_cookies(driver, cookie_str, domain):
+    """注入Cookie
+
+    优先通过 CDP 的 Network.setCookies 一次写入, 不需要先打开站点页面;
+    不支持 CDP 的驱动先打开站点首页再逐个添加。
+    """
+    cookies = parse_cookie_string(cookie_str, domain)
+    try:
+        driver.execute_cdp_cmd('Network.setCookies', {'cookies': cookies})
+    except Exception:
+        driver.get(f"https://{domain.lstrip('.')}/")
+        for cookie in cookies:
+            driver.add_cookie(cookie)
+
+def apply_scraping_options(options):
+    """采集用浏览器的启动参数: DOM就绪即返回、不加载图片"""
+    options.page_load_strategy = settings.BROWSER_CONFIG['page_load_strategy']
+    options.add_argument('--blink-settings=imagesEnabled=false')
+
+def blocked_urls(site=None):
+    """站点的屏蔽规则, 去掉该站点放行的规则"""
+    allowed = settings.BROWSER_CONFIG['allowed_urls'].get(site, [])
+    return [pattern for pattern in settings.BROWSER_CONFIG['blocked_urls'] if pattern not in allowed]
+
+def apply_scraping_profile(driver, site=None):
+    """通过 CDP 屏蔽不需要的资源, 不支持 CDP 时忽略, 返回是否生效"""
+    if not settings.BROWSER_CONFIG['scraping_profile']:
+        return False
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': blocked_urls(site)})
+        return True
+    except Exception as e:
+        print(f"设置资源屏蔽失败: {e}")
+        return False
+
+def wait_timeout(timeout=None):
+    """未指定时使用默认等待超时"""
+    return settings.BROWSER_CONFIG['wait_timeout'] if timeout is None else timeout
+
+def wait_until(driver, condition, timeout=None, message=''):
+    """等待条件成立并返回其结果, 超时抛出 TimeoutException"""
+    return WebDriverWait(driver, wait_timeout(timeout), settings.BROWSER_CONFIG['wait_poll']).until(condition, message)
+
+def wait_for_selector(driver, selector, by=By.CSS_SELECTOR, timeout=None, clickable=False):
+    """等待元素出现(clickable 时等待可点击), 返回元素"""
+    condition = EC.element_to_be_clickable if clickable else EC.presence_of_element_located
+    return wait_until(driver, condition((by, selector)), timeout, f"等待元素超时: {selector}")
+
+def wait_for_new_window(driver, old_handles, timeout=None):
+    """等待新窗口打开, 返回新窗口句柄"""
+    old_handles = set(old_handles)
+    
+    def new_window(driver):
+        handles = [handle for handle in driver.window_handles if handle not in old_handles]
+        return handles[-1] if handles else False
+        
+    return wait_until(driver, new_window, timeout, "等待新窗口超时")
+
+def wait_for_url_change(driver, old_url, timeout=None):
+    """等待地址不再是 old_url(跳转或新窗口开始加载), 返回新地址"""
+    wait_until(driver, lambda driver: driver.current_url != old_url, timeout, f"等待跳转超时: {old_url}")
+    return driver.current_url
+
+def wait_for_network_idle(driver, idle_time=None, timeout=None):
+    """等待页面解析完成且 idle_time 秒内没有新的资源请求
+
+    用于没有明确元素可等的页面; 超时不抛出异常, 返回False。
+    """
+    config = settings.BROWSER_CONFIG
+    idle_time = config['network_idle_time'] if idle_time is None else idle_time
+    timeout = config['network_idle_timeout'] if timeout is None else timeout
+    script = "return [document.readyState, performance.getEntriesByType('resource').length]"
+    state = {'count': None, 'since': time.time()}
+    
+    def network_idle(driver):
+        ready_state, count = driver.execute_script(script)
+        now = time.time()
+        if ready_state == 'loading' or count != state['count']:
+            state['count'] = count
+            state['since'] = now
+            return False
+        return now - state['since'] >= idle_time
+        
+    try:
+        wait_until(driver, network_idle, timeout)
+        return True
+    except TimeoutException:
+        return False
 
 class BrowserPool:
-    """浏览器实例池"""
-    def __init__(self, pool_size=3):
+    """弹性浏览器实例池
+
+    - 按需创建: 第一次借出时才启动浏览器, 最少保留 min_size 个, 最多 pool_size 个;
+      可以调用 warm_up 在后台预先启动, 不阻塞界面
+    - 没有空闲浏览器且已达上限时排队等待, 超时抛出 BrowserError, 不会额外创建
+    - 空闲超过 idle_timeout 秒的浏览器被回收(保留 min_size 个)
+    - 借出 max_uses 次或运行 max_age 秒后重启, 避免渲染进程内存持续增长
+    - 记录每个浏览器已注入Cookie的站点, 按站点借出时优先使用已注入的浏览器
+    - stats() 返回等待时间、利用率和崩溃率等统计
+    """
+    def __init__(self, pool_size=3, min_size=None):
+        config = settings.BROWSER_CONFIG
         self.pool_size = pool_size
-        self.available = Queue()
+        self.min_size = min(config['pool_min'] if min_size is None else min_size, pool_size)
+        self.lease_timeout = config['lease_timeout']
+        self.idle_timeout = config['idle_timeout']
+        self.max_uses = config['max_uses']
+        self.max_age = config['max_age'] * 60
+        self.health_check_idle = config['health_check_idle']
+
+        self.available = []  # 空闲浏览器, 最近归还的在末尾
         self.in_use = set()
-        self.lock = threading.Lock()
-        
-        # 初始化浏览器池
-        for _ in range(pool_size):
-            browser = self.create_browser()
-            if browser:
-                self.available.put(browser)
+        self.info = {}  # {浏览器: {'created', 'leases', 'idle_since', 'leased_at'}}
+        self.size = 0  # 已创建(含正在创建)的浏览器数量
+        self.waiting = 0
+        self.closed = False
+        self.lock = threading.RLock()
+        self.cond = threading.Condition(self.lock)
+        self.reaper = None
+        self.stop_event = threading.Event()
+        self.metrics = {
+            'leases': 0,  # 借出次数
+            'wait_time': 0.0,  # 借出累计等待秒数
+            'max_wait': 0.0,
+            'timeouts': 0,  # 等待超时次数
+            'created': 0,
+            'create_failed': 0,
+            'crashed': 0,  # 归还时已失效或调用方报告出错
+            'recycled': 0,  # 达到使用次数或时间后重启
+            'reaped': 0,  # 空闲回收
+            'busy_time': 0.0,  # 借出累计秒数
+            'browser_time': 0.0  # 已关闭浏览器的累计运行秒数
+        }
     
     def create_browser(self):
         """创建新的浏览器实例"""
@@ -31,6 +168,8 @@ class BrowserPool:
             options.add_argument('--disable-gpu')
             options.add_argument('--no-sandbox')
             options.add_argument('--disable-dev-shm-usage')
+            if settings.BROWSER_CONFIG['scraping_profile']:
+                apply_scraping_options(options)
             
             # 禁用图片加载
             prefs = {
@@ -41,8 +180,8 @@ class BrowserPool:
             }
             options.add_experimental_option('prefs', prefs)
             
-            # 使用 webdriver_manager 自动管理 chromedriver
-            service = Service(ChromeDriverManager().install())
+            # chromedriver 路径只解析一次
+            service = Service(get_driver_path())
             driver = webdriver.Chrome(service=service, options=options)
             print("浏览器创建成功")
             return driver
@@ -51,64 +190,307 @@ class BrowserPool:
             print(f"创建浏览器实例失败: {e}")
             return None
     
-    def get_browser(self, timeout=30):
-        """获取浏览器实例"""
-        try:
-            browser = self.available.get(timeout=timeout)
-            with self.lock:
-                self.in_use.add(browser)
-            return browser
-        except:
-            return self.create_browser()
+    def reserve(self, count=None):
+        """占用一个创建名额, 达到 count(默认 pool_size) 时返回False"""
+        with self.lock:
+            limit = self.pool_size if count is None else min(count, self.pool_size)
+            if self.closed or self.size >= limit:
+                return False
+            self.size += 1
+            return True
+    
+    def release(self):
+        """释放创建名额并唤醒等待者"""
+        with self.cond:
+            self.size -= 1
+            self.cond.notify()
+    
+    def open_browser(self, lease=False):
+        """在已占用的名额上创建浏览器, 失败时释放名额返回None
+
+        lease 为True时直接记入使用中, 创建后到借出前池被关闭也能由 close_all 关闭。
+        """
+        browser = self.create_browser()
+        if browser:
+            apply_scraping_profile(browser)
+        with self.lock:
+            if not browser:
+                self.metrics['create_failed'] += 1
+            elif not self.closed:
+                now = time.time()
+                self.info[browser] = {
+                    'created': now,
+                    'leases': 0,
+                    'idle_since': now,
+                    'leased_at': now,
+                    'cookies': {},  # 已注入的Cookie {域名: Cookie字符串}
+                    'profile': None  # 当前资源屏蔽规则对应的站点
+                }
+                self.metrics['created'] += 1
+                if lease:
+                    self.in_use.add(browser)
+                self.start_reaper()
+                return browser
+        if browser:
+            # 创建过程中池已关闭
+            self.quit_browser(browser)
+        self.release()
+        return None
     
-    def return_browser(self, browser):
-        """归还浏览器实例"""
+    def add_browser(self):
+        """在已占用的名额上创建浏览器并放入空闲列表"""
+        browser = self.open_browser()
         if browser:
+            with self.cond:
+                self.available.append(browser)
+                self.cond.notify()
+    
+    def warm_up(self, count=None):
+        """在后台预先启动浏览器, 默认启动到 pool_size 个"""
+        def run():
+            while self.reserve(count):
+                self.add_browser()
+                
+        threading.Thread(target=run, name='browser-warm-up', daemon=True).start()
+    
+    def get_browser(self, timeout=None, site=None):
+        """借出浏览器
+
+        优先使用空闲的浏览器(指定 site 时优先已注入该站点Cookie的), 没有空闲且未达上限时
+        创建新的, 否则排队等待; 等待超过 timeout 秒(默认 lease_timeout)抛出 BrowserError。
+        """
+        timeout = self.lease_timeout if timeout is None else timeout
+        start = time.time()
+        deadline = start + timeout
+        while True:
+            browser = self.acquire(deadline, timeout, site)
+            if browser is None:
+                browser = self.open_browser(lease=True)
+                if browser is None:
+                    raise BrowserError("创建浏览器实例失败")
+            elif not self.check_idle_browser(browser):
+                continue
+            
             with self.lock:
-                if browser in self.in_use:
-                    self.in_use.remove(browser)
-                    # 检查浏览器是否仍然可用
-                    if self.check_browser(browser):
-                        self.available.put(browser)
-                    else:
-                        self.replace_browser()
+                # 检查期间池被关闭时浏览器已由 close_all 关闭
+                if self.closed:
+                    raise BrowserError("浏览器池已关闭")
+                now = time.time()
+                wait = now - start
+                info = self.info[browser]
+                info['leases'] += 1
+                info['leased_at'] = now
+                self.metrics['leases'] += 1
+                self.metrics['wait_time'] += wait
+                self.metrics['max_wait'] = max(self.metrics['max_wait'], wait)
+            return browser
+    
+    def acquire(self, deadline, timeout, site=None):
+        """等待空闲浏览器或创建名额; 取得名额时返回None, 由调用方创建
+
+        取出的空闲浏览器在持有锁时记入使用中, 借出前的检查期间 close_all 也能关闭它。
+        """
+        with self.cond:
+            self.waiting += 1
+            try:
+                while True:
+                    if self.closed:
+                        raise BrowserError("浏览器池已关闭")
+                    if self.available:
+                        browser = self.take_available(site)
+                        self.in_use.add(browser)
+                        return browser
+                    if self.size < self.pool_size:
+                        self.size += 1
+                        return None
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        self.metrics['timeouts'] += 1
+                        raise BrowserError(f"等待浏览器超时({timeout}秒), 使用中 {len(self.in_use)}/{self.pool_size}")
+                    self.cond.wait(remaining)
+            finally:
+                self.waiting -= 1
+    
+    def take_available(self, site=None):
+        """取出空闲浏览器, 需持有锁; 优先最近归还的、已注入 site Cookie的"""
+        if site:
+            for i in range(len(self.available) - 1, -1, -1):
+                if site in self.info[self.available[i]]['cookies']:
+                    return self.available.pop(i)
+        return self.available.pop()
+    
+    def primed_cookie(self, browser, site):
+        """浏览器已注入的该站点Cookie, 没有返回None"""
+        with self.lock:
+            info = self.info.get(browser)
+            return info['cookies'].get(site) if info else None
+    
+    def set_primed_cookie(self, browser, site, cookie_str):
+        """记录浏览器已注入的Cookie, cookie_str 为None表示清除"""
+        with self.lock:
+            info = self.info.get(browser)
+            if info is None:
+                return
+            if cookie_str is None:
+                info['cookies'].pop(site, None)
+            else:
+                info['cookies'][site] = cookie_str
+    
+    def set_profile(self, browser, site):
+        """按站点切换资源屏蔽规则, 规则相同时不重复设置"""
+        with self.lock:
+            info = self.info.get(browser)
+            if info is None or blocked_urls(site) == blocked_urls(info['profile']):
+                return
+            info['profile'] = site
+        apply_scraping_profile(browser, site)
+    
+    def check_idle_browser(self, browser):
+        """借出前检查: 空闲较久的浏览器做一次实际请求, 失效时丢弃"""
+        with self.lock:
+            info = self.info.get(browser)
+            if info is None:
+                # 池已关闭, 浏览器已由 close_all 关闭
+                return False
+            idle = time.time() - info['idle_since']
+        if idle < self.health_check_idle and self.is_alive(browser):
+            return True
+        if self.check_browser(browser):
+            return True
+        with self.lock:
+            if browser in self.in_use:
+                self.in_use.remove(browser)
+                self.metrics['crashed'] += 1
+                self.discard(browser)
+        return False
+    
+    def return_browser(self, browser, broken=False):
+        """归还浏览器实例, broken 表示调用方遇到浏览器错误"""
+        if not browser:
+            return
+        with self.cond:
+            if browser not in self.in_use:
+                return
+            self.in_use.remove(browser)
+            now = time.time()
+            info = self.info[browser]
+            self.metrics['busy_time'] += now - info['leased_at']
+            
+            if broken or not self.is_alive(browser):
+                self.metrics['crashed'] += 1
+            elif info['leases'] >= self.max_uses or now - info['created'] >= self.max_age:
+                self.metrics['recycled'] += 1
+            else:
+                info['idle_since'] = now
+                self.available.append(browser)
+                self.cond.notify()
+                return
+            self.discard(browser)
+        self.quit_browser(browser)
+        self.ensure_min_size()
+    
+    def discard(self, browser):
+        """移出池并释放名额, 需持有锁; 浏览器由调用方关闭"""
+        info = self.info.pop(browser, None)
+        if info:
+            self.metrics['browser_time'] += time.time() - info['created']
+        self.size -= 1
+        self.cond.notify()
+    
+    def is_alive(self, browser):
+        """不发请求的快速检查: chromedriver 进程是否仍在运行"""
+        try:
+            return browser.service.process.poll() is None
+        except AttributeError:
+            return True
     
     def check_browser(self, browser):
-        """检查浏览器是否可用"""
+        """检查浏览器是否可用, 不可用时关闭"""
         try:
             browser.current_url
             return True
         except:
-            try:
-                browser.quit()
-            except:
-                pass
+            self.quit_browser(browser)
             return False
     
-    def replace_browser(self):
-        """替换失效的浏览器"""
-        browser = self.create_browser()
-        if browser:
-            self.available.put(browser)
+    def quit_browser(self, browser):
+        """关闭浏览器, 忽略错误"""
+        try:
+            browser.quit()
+        except:
+            pass
+    
+    def ensure_min_size(self):
+        """浏览器少于 min_size 时在后台补充"""
+        if self.min_size and not self.closed and self.size < self.min_size:
+            self.warm_up(self.min_size)
+    
+    def start_reaper(self):
+        """启动空闲回收线程, 需持有锁"""
+        if self.reaper is None:
+            self.reaper = threading.Thread(target=self.reap_loop, name='browser-reaper', daemon=True)
+            self.reaper.start()
+    
+    def reap_loop(self):
+        """定期回收空闲过久或运行过久的浏览器"""
+        interval = max(1, min(self.idle_timeout, self.max_age) / 4)
+        while not self.stop_event.wait(interval):
+            self.reap()
+    
+    def reap(self):
+        """回收空闲超过 idle_timeout 或运行超过 max_age 的空闲浏览器"""
+        now = time.time()
+        expired = []
+        with self.cond:
+            # 从最久未用的开始
+            for browser in list(self.available):
+                info = self.info[browser]
+                too_old = now - info['created'] >= self.max_age
+                too_idle = now - info['idle_since'] >= self.idle_timeout and self.size > self.min_size
+                if too_old or too_idle:
+                    self.available.remove(browser)
+                    self.metrics['recycled' if too_old else 'reaped'] += 1
+                    self.discard(browser)
+                    expired.append(browser)
+        for browser in expired:
+            self.quit_browser(browser)
+        if expired:
+            print(f"回收浏览器 {len(expired)} 个, 当前 {self.size} 个")
+            self.ensure_min_size()
+    
+    def stats(self):
+        """池的运行统计"""
+        with self.lock:
+            now = time.time()
+            stats = dict(self.metrics)
+            browser_time = stats['browser_time'] + sum(now - info['created'] for info in self.info.values())
+            busy_time = stats['busy_time'] + sum(now - self.info[b]['leased_at'] for b in self.in_use if b in self.info)
+            stats.update({
+                'size': self.size,
+                'in_use': len(self.in_use),
+                'idle': len(self.available),
+                'waiting': self.waiting,
+                'avg_wait': stats['wait_time'] / stats['leases'] if stats['leases'] else 0.0,
+                # 浏览器运行时间中被借出的比例
+                'utilization': busy_time / browser_time if browser_time else 0.0,
+                'crash_rate': stats['crashed'] / stats['created'] if stats['created'] else 0.0
+            })
+            return stats
     
     def close_all(self):
         """关闭所有浏览器"""
-        # 关闭可用的浏览器
-        while not self.available.empty():
-            browser = self.available.get()
-            try:
-                browser.quit()
-            except:
-                pass
-        
-        # 关闭使用中的浏览器
-        with self.lock:
-            for browser in self.in_use:
-                try:
-                    browser.quit()
-                except:
-                    pass
+        self.stop_event.set()
+        with self.cond:
+            self.closed = True
+            browsers = self.available + list(self.in_use)
+            self.available = []
             self.in_use.clear()
+            for browser in browsers:
+                self.discard(browser)
+            self.cond.notify_all()
+        
+        for browser in browsers:
+            self.quit_browser(browser)
 
 class Browser:
     """浏览器管理类"""
@@ -120,37 +502,65 @@ class Browser:
         if not cls._pool:
             cls._pool = BrowserPool(pool_size)
     
+    @classmethod
+    def warm_up(cls, count=None):
+        """在后台预先启动浏览器"""
+        cls.init_pool(settings.BROWSER_CONFIG['pool_size'])
+        cls._pool.warm_up(count)
+    
     def __init__(self):
         self.driver = None
         if not self._pool:
-            self.init_pool()
+            self.init_pool(settings.BROWSER_CONFIG['pool_size'])
     
-    def init_driver(self):
-        """初始化浏览器"""
+    def init_driver(self, site=None, cookie_str=None):
+        """从池中借出浏览器, 等待超时抛出 BrowserError
+
+        指定 site 时优先借出已注入该站点Cookie的浏览器, 同时给出 cookie_str 则确保已注入。
+        """
         if not self.driver:
-            self.driver = self._pool.get_browser()
+            self.driver = self._pool.get_browser(site=site)
+        self._pool.set_profile(self.driver, site)
+        if site and cookie_str:
+            self.add_cookie(cookie_str, site)
         return self.driver is not None
     
-    def close_driver(self):
-        """关闭浏览器"""
+    def close_driver(self, broken=False):
+        """归还浏览器, broken 表示使用中遇到浏览器错误, 归还后重启"""
         if self.driver:
-            self._pool.return_browser(self.driver)
+            self._pool.return_browser(self.driver, broken)
             self.driver = None
     
-    def wait_for_element(self, by, value, timeout=10):
+    def wait_for_element(self, by, value, timeout=None):
         """等待元素出现"""
-        return WebDriverWait(self.driver, timeout).until(
-            EC.presence_of_element_located((by, value))
-        )
-    
-    def add_cookie(self, cookie_str, domain):
-        """添加Cookie"""
-        if cookie_str and self.driver:
-            for cookie_item in cookie_str.split('; '):
-                name, value = cookie_item.split('=', 1)
-                self.driver.add_cookie({
-                    'name': name,
-                    'value': value,
-                    'domain': domain,
-                    'path': '/'
-                }) 
\ No newline at end of file
+        return wait_for_selector(self.driver, value, by, timeout)
+    
+    def wait_for_selector(self, selector, by=By.CSS_SELECTOR, timeout=None, clickable=False):
+        """等待元素出现, 超时抛出 TimeoutException"""
+        return wait_for_selector(self.driver, selector, by, timeout, clickable)
+    
+    def wait_for_new_window(self, old_handles, timeout=None):
+        """等待新窗口打开, 返回新窗口句柄"""
+        return wait_for_new_window(self.driver, old_handles, timeout)
+    
+    def wait_for_url_change(self, old_url, timeout=None):
+        """等待地址变化, 返回新地址"""
+        return wait_for_url_change(self.driver, old_url, timeout)
+    
+    def wait_for_network_idle(self, idle_time=None, timeout=None):
+        """等待网络空闲, 超时返回False"""
+        return wait_for_network_idle(self.driver, idle_time, timeout)
+    
+    def add_cookie(self, cookie_str, domain, force=False):
+        """添加Cookie, 同一浏览器对同一站点只注入一次
+
+        返回是否实际注入; 已打开的页面需要刷新后才会带上新Cookie。
+        force 用于检测到登录失效时重新注入。
+        """
+        if not cookie_str or not self.driver:
+            return False
+        if not force and self._pool.primed_cookie(self.driver, domain) == cookie_str:
+            return False
+        inject_cookies(self.driver, cookie_str, domain)
+        self._pool.set_primed_cookie(self.driver, domain, cookie_str)
+        return True 
\ No newline at end of file
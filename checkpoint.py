@@ -0,0 +1,63 @@
+import json
+import os
+import threading
+from datetime import datetime
+import settings
+import logging
+
+class CheckpointJournal:
+    """采集断点日志
+
+    每采集完成一个游戏追加一行JSON并立即fsync, 进程崩溃后重启可跳过已采集的游戏
+    并重放已有结果。同一游戏ID多次写入时以最后一次为准。
+    """
+    def __init__(self, name):
+        self.path = settings.DATA_DIR / 'checkpoints' / f'{name}.jsonl'
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger('spider')
+        self.repair()
+
+    def repair(self):
+        """截掉崩溃时写了一半的最后一行, 避免与后续追加的记录粘连"""
+        if not self.path.exists():
+            return
+        with open(self.path, 'rb+') as f:
+            data = f.read()
+            if data and not data.endswith(b'\n'):
+                f.truncate(data.rfind(b'\n') + 1)
+
+    def load(self):
+        """读取已记录的结果, 返回 {游戏ID: 结果}"""
+        results = {}
+        if not self.path.exists():
+            return results
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    results[str(entry['id'])] = entry['result']
+                except (ValueError, KeyError):
+                    # 崩溃时最后一行可能只写了一半
+                    self.logger.warning(f"跳过损坏的断点记录: {self.path}")
+        return results
+
+    def append(self, game_id, result):
+        """追加一条结果并落盘"""
+        entry = {
+            'id': str(game_id),
+            'time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'result': result
+        }
+        line = json.dumps(entry, ensure_ascii=False) + '\n'
+        with self.lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def clear(self):
+        """采集全部完成后删除断点日志"""
+        with self.lock:
+            if self.path.exists():
+                self.path.unlink()
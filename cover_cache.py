@@ -0,0 +1,200 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+import settings
+import logging
+
+class MemoryCache:
+    """按字节数限制大小的解码后封面LRU缓存, 只在界面线程使用"""
+    def __init__(self, max_bytes=None):
+        self.max_bytes = max_bytes or settings.IMAGE_CONFIG['memory_cache_mb'] * 1024 * 1024
+        self.items = OrderedDict()
+        self.size = 0
+
+    def __contains__(self, key):
+        return key in self.items
+
+    def __len__(self):
+        return len(self.items)
+
+    @staticmethod
+    def cost(pixmap):
+        """图片占用的字节数"""
+        return pixmap.width() * pixmap.height() * max(pixmap.depth(), 8) // 8
+
+    def get(self, key):
+        """读取并标记为最近使用, 不存在返回None"""
+        pixmap = self.items.get(key)
+        if pixmap is not None:
+            self.items.move_to_end(key)
+        return pixmap
+
+    def put(self, key, pixmap):
+        """放入缓存, 超出上限时丢弃最久未使用的图片"""
+        self.remove(key)
+        self.items[key] = pixmap
+        self.size += self.cost(pixmap)
+        while self.size > self.max_bytes and len(self.items) > 1:
+            _, old = self.items.popitem(last=False)
+            self.size -= self.cost(old)
+
+    def remove(self, key):
+        """移除图片"""
+        pixmap = self.items.pop(key, None)
+        if pixmap is not None:
+            self.size -= self.cost(pixmap)
+
+    def clear(self):
+        """清空缓存"""
+        self.items.clear()
+        self.size = 0
+
+class DiskCache:
+    """按内容寻址的磁盘封面缓存
+
+    图片按内容的SHA1保存, 相同图片只存一份; index.db 记录 URL 对应的文件、
+    ETag/Last-Modified 和访问时间, 超出大小上限时删除最久未访问的图片。
+    可以在多个线程中使用。
+    """
+    def __init__(self, root=None, max_bytes=None):
+        self.root = root or settings.DATA_DIR / 'cache' / 'covers'
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.root / 'index.db'
+        self.max_bytes = max_bytes or settings.IMAGE_CONFIG['disk_cache_mb'] * 1024 * 1024
+        self.max_age = settings.IMAGE_CONFIG['revalidate_days'] * 24 * 3600
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger('spider')
+        self.init_storage()
+
+    def connect(self):
+        """打开索引数据库连接"""
+        conn = sqlite3.connect(str(self.db_path))
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def init_storage(self):
+        """创建索引表"""
+        conn = self.connect()
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            with conn:
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS covers (
+                        url TEXT PRIMARY KEY,
+                        digest TEXT NOT NULL,
+                        size INTEGER NOT NULL,
+                        etag TEXT,
+                        last_modified TEXT,
+                        checked_time REAL NOT NULL,
+                        access_time REAL NOT NULL
+                    )
+                ''')
+                conn.execute('CREATE INDEX IF NOT EXISTS idx_covers_access ON covers (access_time)')
+                conn.execute('CREATE INDEX IF NOT EXISTS idx_covers_digest ON covers (digest)')
+        finally:
+            conn.close()
+
+    def path(self, digest):
+        """图片文件路径, 按前两位分目录"""
+        return self.root / digest[:2] / digest
+
+    def lookup(self, url):
+        """查找URL对应的缓存记录, 文件丢失时返回None"""
+        conn = self.connect()
+        try:
+            row = conn.execute(
+                'SELECT digest, etag, last_modified, checked_time FROM covers WHERE url = ?', (url,)
+            ).fetchone()
+        finally:
+            conn.close()
+        if not row or not self.path(row[0]).exists():
+            return None
+        return {
+            'digest': row[0],
+            'etag': row[1],
+            'last_modified': row[2],
+            'checked_time': row[3]
+        }
+
+    def is_stale(self, entry):
+        """是否需要向服务器校验"""
+        return time.time() - entry['checked_time'] > self.max_age
+
+    def read(self, entry):
+        """读取缓存的图片内容"""
+        with open(self.path(entry['digest']), 'rb') as f:
+            return f.read()
+
+    def touch(self, url, checked=False):
+        """更新访问时间, checked 时同时更新校验时间"""
+        now = time.time()
+        conn = self.connect()
+        try:
+            with conn:
+                if checked:
+                    conn.execute('UPDATE covers SET access_time = ?, checked_time = ? WHERE url = ?', (now, now, url))
+                else:
+                    conn.execute('UPDATE covers SET access_time = ? WHERE url = ?', (now, url))
+        finally:
+            conn.close()
+
+    def store(self, url, data, etag=None, last_modified=None):
+        """保存图片内容"""
+        digest = hashlib.sha1(data).hexdigest()
+        path = self.path(digest)
+        if not path.exists():
+            path.parent.mkdir(exist_ok=True)
+            # 先写临时文件再替换, 中断时不会留下不完整的图片
+            temp_path = path.with_name(f'{digest}.{threading.get_ident()}.tmp')
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+
+        now = time.time()
+        with self.lock:
+            conn = self.connect()
+            try:
+                with conn:
+                    old = conn.execute('SELECT digest FROM covers WHERE url = ?', (url,)).fetchone()
+                    conn.execute('''
+                        INSERT OR REPLACE INTO covers
+                        (url, digest, size, etag, last_modified, checked_time, access_time)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ''', (url, digest, len(data), etag, last_modified, now, now))
+                    if old and old[0] != digest:
+                        self.remove_unused(conn, old[0])
+                    self.evict(conn)
+            finally:
+                conn.close()
+
+    def remove_unused(self, conn, digest):
+        """没有URL再引用时删除图片文件"""
+        if not conn.execute('SELECT 1 FROM covers WHERE digest = ? LIMIT 1', (digest,)).fetchone():
+            try:
+                self.path(digest).unlink()
+            except FileNotFoundError:
+                pass
+
+    def total_size(self, conn):
+        """缓存文件总大小, 相同内容只计一次"""
+        return conn.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM (SELECT size FROM covers GROUP BY digest)'
+        ).fetchone()[0]
+
+    def evict(self, conn):
+        """超出上限时按访问时间删除最久未用的图片"""
+        total = self.total_size(conn)
+        if total <= self.max_bytes:
+            return
+        rows = conn.execute('SELECT url, digest, size FROM covers ORDER BY access_time').fetchall()
+        for url, digest, size in rows:
+            if total <= self.max_bytes:
+                break
+            conn.execute('DELETE FROM covers WHERE url = ?', (url,))
+            if not conn.execute('SELECT 1 FROM covers WHERE digest = ? LIMIT 1', (digest,)).fetchone():
+                total -= size
+                self.remove_unused(conn, digest)
+        self.logger.info(f"清理封面缓存, 当前大小 {total // 1024} KB")
@@ -0,0 +1,95 @@
+from urllib.parse import urljoin
+from bs4 import BeautifulSoup
+from lxml import html as lxml_html
+
+# 与 sites_config.json 中 selectors 同名的默认选择器
+# 以 / 或 ( 开头的按XPath解析, 其余按CSS选择器解析
+DEFAULT_SELECTORS = {
+    'title': 'h1',
+    'intro': "//div[@class='entry-content']/p[1]",
+    'video': 'video',
+    'info': "//h4[contains(text(), '版本介绍')]/following-sibling::p[1]",
+    'download_buttons': '.download-button-box button'
+}
+
+def is_xpath(selector):
+    """判断选择器是否为XPath"""
+    return selector.lstrip().startswith(('/', '('))
+
+class DetailPage:
+    """详情页HTML解析器, 不依赖浏览器"""
+    def __init__(self, page_html, url, selectors=None):
+        self.url = url
+        self.selectors = dict(DEFAULT_SELECTORS)
+        self.selectors.update(selectors or {})
+        self.soup = BeautifulSoup(page_html, 'html.parser')
+        self.tree = lxml_html.fromstring(page_html)
+
+    def find_all(self, selector):
+        """按选择器查找元素, 返回 (元素列表, 是否XPath)"""
+        if is_xpath(selector):
+            return self.tree.xpath(selector), True
+        return self.soup.select(selector), False
+
+    def find(self, selector):
+        """查找第一个元素"""
+        elements, xpath = self.find_all(selector)
+        return (elements[0] if elements else None), xpath
+
+    def text(self, key):
+        """获取元素文本"""
+        element, xpath = self.find(self.selectors[key])
+        if element is None:
+            return ''
+        return (element.text_content() if xpath else element.get_text()).strip()
+
+    def attr(self, element, name):
+        """获取元素属性, 链接类属性转为绝对地址"""
+        value = element.get(name) or ''
+        return urljoin(self.url, value) if value else ''
+
+    def video_url(self):
+        """获取视频地址, 兼容 <video><source src></video>"""
+        element, xpath = self.find(self.selectors['video'])
+        if element is None:
+            return ''
+        src = self.attr(element, 'src')
+        if not src:
+            source = element.find('.//source') if xpath else element.find('source')
+            if source is not None:
+                src = self.attr(source, 'src')
+        return src
+
+    def download_button_count(self):
+        """下载按钮数量"""
+        elements, _ = self.find_all(self.selectors['download_buttons'])
+        return len(elements)
+
+    def download_links(self):
+        """按 selectors['download_links'] 提取页面上直接给出的网盘链接"""
+        links = {}
+        for pan_name, selector in self.selectors.get('download_links', {}).items():
+            element, _ = self.find(selector)
+            if element is not None:
+                links[pan_name] = self.attr(element, 'href')
+        return links
+
+    def parse(self):
+        """解析详情页字段"""
+        return {
+            '标题': self.text('title'),
+            '游戏介绍': self.text('intro'),
+            '视频URL': self.video_url(),
+            '图片URL': '',
+            '游戏信息': self.text('info')
+        }
+
+    def is_valid(self):
+        """校验解析结果
+
+        标题为空, 或既没有下载按钮也没有网盘链接, 通常说明需要JS渲染或未登录,
+        由调用方改用浏览器, 不能返回空的链接。
+        """
+        if not self.text('title'):
+            return False
+        return bool(self.download_button_count() or self.download_links())
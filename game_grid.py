@@ -0,0 +1,460 @@
+import time
+from collections import OrderedDict
+from PyQt5.QtWidgets import QListView, QStyledItemDelegate, QStyle, QAbstractItemView, QToolTip
+from PyQt5.QtCore import (Qt, QAbstractListModel, QModelIndex, QItemSelection, QItemSelectionModel,
+                          QSize, QRect, QPoint, QEvent, QTimer, pyqtSignal)
+from PyQt5.QtGui import QColor, QIcon, QFont
+import constants
+import settings
+from ui.image_cache import ImageCache
+from image_loader import get_image_loader
+
+class GameGridModel(QAbstractListModel):
+    """游戏网格数据模型
+
+    只记录满足条件的游戏总数, 游戏数据按块从 GameList 读取并缓存最近使用的若干块,
+    滚动时不会一次读取全部游戏。
+    监听 GameList 的数据变化, 同一帧内的多次变化合并为一次刷新, 修改只重绘对应的卡片。
+    没有筛选条件时新增的游戏直接插入对应的行; 其他需要重新查询的变化合并后最多每秒
+    重新加载一次, 重新加载前后发出 reloading / reloaded, 由视图保持选中和滚动位置。
+    """
+    # 缓存的块数
+    MAX_BLOCKS = 20
+    # 合并变化的间隔(毫秒), 约一帧
+    REFRESH_INTERVAL = 16
+    # 两次重新加载的最短间隔(毫秒), 采集时新增频繁, 避免网格不停重置
+    RESET_INTERVAL = 1000
+    # 插入新增游戏时等待其他未送达的新增通知的次数
+    MAX_INSERT_RETRIES = 3
+
+    # GameList 可能在工作线程中修改, 通过信号转到界面线程处理
+    games_changed = pyqtSignal(str, list)
+    # 数据变化导致重新加载的前后
+    reloading = pyqtSignal()
+    reloaded = pyqtSignal()
+
+    def __init__(self, game_list, parent=None):
+        super().__init__(parent)
+        self.game_list = game_list
+        self.filter = None
+        self.total = 0
+        self.block_size = settings.UI_CONFIG['cards_per_page']
+        self.blocks = OrderedDict()
+        self.failed_images = set()  # 加载失败的图片URL, 不再重试
+        self.image_loader = get_image_loader()
+        self.image_loader.image_loaded.connect(self.on_image_loaded)
+        self.image_loader.image_failed.connect(self.on_image_failed)
+
+        self.pending_ids = set()
+        self.pending_added = set()
+        self.pending_reset = False
+        self.insert_retries = 0
+        self.last_reset = 0.0
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.timeout.connect(self.apply_changes)
+        self.games_changed.connect(self.on_games_changed)
+        self.listener = self.games_changed.emit
+        self.game_list.add_listener(self.listener)
+
+    def set_filter(self, filter=None):
+        """设置查询条件并重新加载"""
+        self.beginResetModel()
+        self.filter = filter
+        self.total = self.game_list.count(filter)
+        # 重新查询已包含尚未插入的新增游戏
+        self.pending_added.clear()
+        self.clear_blocks()
+        self.endResetModel()
+        
+    def clear_blocks(self):
+        """清空缓存的块, 取消其中还未开始的图片请求"""
+        while self.blocks:
+            self.evict_block()
+            
+    def evict_block(self):
+        """丢弃最久未使用的块"""
+        _, games = self.blocks.popitem(last=False)
+        self.cancel_images(games)
+
+    def cancel_images(self, games):
+        """取消这些游戏还未开始的图片请求"""
+        for game in games:
+            if game.get('image_url'):
+                self.image_loader.cancel(game['image_url'])
+
+    def drop_blocks(self, first_block):
+        """丢弃从指定块开始的缓存块, 插入行后这些块的内容已经错位"""
+        for block_no in [block_no for block_no in self.blocks if block_no >= first_block]:
+            self.cancel_images(self.blocks.pop(block_no))
+
+    def refresh(self):
+        """按当前条件重新加载"""
+        self.set_filter(self.filter)
+
+    def reload(self):
+        """数据变化后重新加载, 视图据 reloading / reloaded 保持选中和滚动位置"""
+        self.reloading.emit()
+        self.refresh()
+        self.reloaded.emit()
+
+    def rows_of(self, game_ids):
+        """游戏在当前条件下的行号 {游戏ID: 行号}"""
+        return self.game_list.rows_of(game_ids, self.filter)
+
+    def close(self):
+        """停止监听数据变化"""
+        self.game_list.remove_listener(self.listener)
+        self.image_loader.cancel_all()
+
+    def on_games_changed(self, event, game_ids):
+        """记录变化, 等到下一帧统一处理"""
+        if event == 'added' and not self.filter:
+            # 按ID倒序时新增游戏的行号可以直接算出
+            self.pending_added.update(game_ids)
+        elif event != 'updated' or set(self.filter or {}) - {'keyword'}:
+            # 删除/整体替换会改变行号; 有筛选条件时新增或修改可能改变是否满足条件, 都需要重新查询
+            self.pending_reset = True
+        else:
+            self.pending_ids.update(game_ids)
+        self.schedule_changes()
+
+    def schedule_changes(self, delay=None):
+        """安排处理合并的变化, 重新加载距上次不足 RESET_INTERVAL 时推迟"""
+        if delay is None:
+            delay = self.REFRESH_INTERVAL
+        if self.pending_reset:
+            elapsed = int((time.monotonic() - self.last_reset) * 1000)
+            delay = max(delay, self.RESET_INTERVAL - elapsed)
+        if not self.refresh_timer.isActive() or self.refresh_timer.remainingTime() < delay:
+            self.refresh_timer.start(delay)
+
+    def apply_changes(self):
+        """应用合并后的变化"""
+        if self.pending_reset:
+            self.pending_reset = False
+            self.pending_ids.clear()
+            self.pending_added.clear()
+            self.insert_retries = 0
+            self.last_reset = time.monotonic()
+            self.reload()
+            return
+
+        if self.pending_added:
+            self.insert_games()
+        game_ids, self.pending_ids = self.pending_ids, set()
+        self.refresh_games(game_ids)
+
+    def insert_games(self):
+        """把新增的游戏插入到按ID倒序的对应行, 只丢弃插入位置之后的缓存块"""
+        total, rows = self.game_list.index_rows(self.pending_added)
+        added = total - self.total
+        if added != len(rows):
+            if added > len(rows) and self.insert_retries < self.MAX_INSERT_RETRIES:
+                # 还有新增的通知没有送达, 等它们一起插入
+                self.insert_retries += 1
+                self.schedule_changes()
+                return
+            # 期间有删除等未通知的变化, 行号无法对应, 改为重新加载
+            self.pending_reset = True
+            self.schedule_changes()
+            return
+        self.pending_added.clear()
+        self.insert_retries = 0
+        if not rows:
+            return
+
+        rows = sorted(rows.values())
+        self.drop_blocks(rows[0] // self.block_size)
+        # 按行号从小到大插入, 连续的行一次插入
+        start = 0
+        for i in range(1, len(rows) + 1):
+            if i == len(rows) or rows[i] != rows[i - 1] + 1:
+                self.beginInsertRows(QModelIndex(), rows[start], rows[i - 1])
+                self.total += i - start
+                self.endInsertRows()
+                start = i
+
+    def refresh_games(self, game_ids):
+        """重新读取已缓存的游戏并只重绘对应的行, 未缓存的行下次显示时读取"""
+        rows = {}
+        for block_no, games in self.blocks.items():
+            for offset, game in enumerate(games):
+                if game['id'] in game_ids:
+                    rows[game['id']] = (block_no, offset)
+        if not rows:
+            return
+
+        for game in self.game_list.get_games(rows):
+            block_no, offset = rows[game['id']]
+            self.blocks[block_no][offset] = game
+            index = self.index(block_no * self.block_size + offset)
+            self.dataChanged.emit(index, index)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.total
+
+    def block(self, block_no):
+        """读取一块游戏, 超出缓存数量时丢弃最久未使用的块"""
+        if block_no in self.blocks:
+            self.blocks.move_to_end(block_no)
+        else:
+            self.blocks[block_no] = self.game_list.page(
+                block_no * self.block_size, self.block_size, filter=self.filter
+            )
+            while len(self.blocks) > self.MAX_BLOCKS:
+                self.evict_block()
+        return self.blocks[block_no]
+
+    def game_at(self, row):
+        """获取指定行的游戏"""
+        if not 0 <= row < self.total:
+            return None
+        games = self.block(row // self.block_size)
+        offset = row % self.block_size
+        return games[offset] if offset < len(games) else None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        game = self.game_at(index.row())
+        if game is None:
+            return None
+        if role == Qt.DisplayRole:
+            return game['title']
+        if role == Qt.UserRole:
+            return game
+        if role == Qt.DecorationRole:
+            return self.image(game)
+        return None
+
+    def image(self, game):
+        """获取封面, 未缓存时后台加载并先返回占位图
+
+        只有绘制可见卡片时才会调用, 后请求的图片优先加载。
+        """
+        image_url = game.get('image_url')
+        if not image_url or image_url in self.failed_images:
+            return ImageCache.default
+        pixmap = self.image_loader.pixmap(image_url)
+        if pixmap is not None:
+            return pixmap
+        self.image_loader.request(image_url)
+        return ImageCache.placeholder
+
+    def on_image_loaded(self, image_url):
+        """图片加载完成"""
+        self.repaint_image(image_url)
+
+    def on_image_failed(self, image_url):
+        """图片加载失败, 显示默认图片"""
+        self.failed_images.add(image_url)
+        self.repaint_image(image_url)
+
+    def repaint_image(self, image_url):
+        """只刷新已缓存块中使用该图片的行"""
+        for block_no, games in self.blocks.items():
+            for offset, game in enumerate(games):
+                if game.get('image_url') == image_url:
+                    index = self.index(block_no * self.block_size + offset)
+                    self.dataChanged.emit(index, index, [Qt.DecorationRole])
+
+    def game_ids(self, indexes):
+        """获取多个行的游戏ID"""
+        ids = []
+        for index in indexes:
+            game = self.game_at(index.row())
+            if game:
+                ids.append(game['id'])
+        return ids
+
+class GameCardDelegate(QStyledItemDelegate):
+    """绘制游戏卡片: 封面、标题和网盘图标
+
+    只在绘制时读取数据, 不为每个游戏创建控件。
+    """
+    link_clicked = pyqtSignal(str)  # 点击网盘图标, 参数为链接
+
+    PADDING = 5
+    TITLE_HEIGHT = 40
+    ICON_SIZE = 35
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.card_size = QSize(*settings.UI_CONFIG['card_size'])
+        self.image_size = QSize(*settings.IMAGE_CONFIG['size'])
+        self.icons = {pan_type: QIcon(f'icons/{pan_type}.png') for pan_type, _ in constants.PAN_TYPES}
+        self.title_font = QFont()
+        self.title_font.setPixelSize(12)
+
+    def sizeHint(self, option, index):
+        return self.card_size
+
+    def image_rect(self, rect):
+        """封面区域"""
+        return QRect(
+            rect.x() + (rect.width() - self.image_size.width()) // 2,
+            rect.y() + self.PADDING,
+            self.image_size.width(),
+            self.image_size.height()
+        )
+
+    def title_rect(self, rect):
+        """标题区域"""
+        top = self.image_rect(rect).bottom() + self.PADDING
+        return QRect(rect.x() + self.PADDING, top, rect.width() - self.PADDING * 2, self.TITLE_HEIGHT)
+
+    def pan_rects(self, rect, game):
+        """有链接的网盘图标区域 [(网盘, 区域)]"""
+        pans = [pan_type for pan_type, _ in constants.PAN_TYPES if game.get(pan_type)]
+        width = len(pans) * self.ICON_SIZE + max(0, len(pans) - 1) * self.PADDING
+        left = rect.x() + (rect.width() - width) // 2
+        top = self.title_rect(rect).bottom() + self.PADDING
+        return [
+            (pan, QRect(left + i * (self.ICON_SIZE + self.PADDING), top, self.ICON_SIZE, self.ICON_SIZE))
+            for i, pan in enumerate(pans)
+        ]
+
+    def paint(self, painter, option, index):
+        game = index.data(Qt.UserRole)
+        if not game:
+            return
+        rect = option.rect
+        painter.save()
+
+        # 背景
+        if option.state & QStyle.State_Selected:
+            painter.fillRect(rect, QColor('#e0e0e0'))
+        elif option.state & QStyle.State_MouseOver:
+            painter.fillRect(rect, QColor('#f0f0f0'))
+        else:
+            painter.fillRect(rect, Qt.white)
+
+        # 封面, 保持比例居中
+        pixmap = index.data(Qt.DecorationRole)
+        if pixmap is not None and not pixmap.isNull():
+            target = self.image_rect(rect)
+            scaled = pixmap.size().scaled(target.size(), Qt.KeepAspectRatio)
+            painter.drawPixmap(QRect(
+                target.x() + (target.width() - scaled.width()) // 2,
+                target.y() + (target.height() - scaled.height()) // 2,
+                scaled.width(),
+                scaled.height()
+            ), pixmap)
+
+        # 标题
+        painter.setFont(self.title_font)
+        painter.setPen(Qt.black)
+        painter.drawText(self.title_rect(rect), Qt.AlignCenter | Qt.TextWordWrap, game['title'])
+
+        # 网盘图标
+        for pan, pan_rect in self.pan_rects(rect, game):
+            self.icons[pan].paint(painter, pan_rect)
+
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        """点击网盘图标时复制链接"""
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            game = index.data(Qt.UserRole)
+            if game:
+                for pan, pan_rect in self.pan_rects(option.rect, game):
+                    if pan_rect.contains(event.pos()):
+                        self.link_clicked.emit(game[pan])
+                        return True
+        return super().editorEvent(event, model, option, index)
+
+    def helpEvent(self, event, view, option, index):
+        """网盘图标的提示文字"""
+        game = index.data(Qt.UserRole)
+        if game and event.type() == QEvent.ToolTip:
+            for pan, pan_rect in self.pan_rects(option.rect, game):
+                if pan_rect.contains(event.pos()):
+                    QToolTip.showText(event.globalPos(), dict(constants.PAN_TYPES)[pan], view)
+                    return True
+        return super().helpEvent(event, view, option, index)
+
+class GameGridView(QListView):
+    """虚拟化的游戏网格, 只绘制可见的卡片, 支持连续滚动和多选"""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setViewMode(QListView.IconMode)
+        self.setMovement(QListView.Static)
+        self.setResizeMode(QListView.Adjust)
+        self.setUniformItemSizes(True)
+        self.setSpacing(7)
+        self.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.verticalScrollBar().setSingleStep(30)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.setMouseTracking(True)
+        self.setStyleSheet('QListView { border: none; outline: none; }')
+        self.delegate = GameCardDelegate(self)
+        self.setItemDelegate(self.delegate)
+        self.selected_ids = set()  # 选中的游戏ID, 在选中时记录, 不受之后数据变化影响
+        self.saved_position = None  # 重新加载前的 (选中ID, 当前ID, 第一个可见ID)
+
+    def setModel(self, model):
+        super().setModel(model)
+        self.selected_ids.clear()
+        self.selectionModel().selectionChanged.connect(self.track_selection)
+        model.modelReset.connect(self.selected_ids.clear)
+        if isinstance(model, GameGridModel):
+            model.reloading.connect(self.save_position)
+            model.reloaded.connect(self.restore_position)
+
+    def first_visible_row(self):
+        """当前可见的第一行"""
+        index = self.indexAt(QPoint(self.spacing() * 2, self.spacing() * 2))
+        if not index.isValid():
+            index = self.indexAt(self.viewport().rect().center())
+        return index.row() if index.isValid() else 0
+
+    def track_selection(self, selected, deselected):
+        """记录选中的游戏ID
+
+        重新加载前数据可能已经变化, 那时再按行号读取会得到别的游戏。
+        """
+        model = self.model()
+        self.selected_ids.difference_update(model.game_ids(deselected.indexes()))
+        self.selected_ids.update(model.game_ids(selected.indexes()))
+
+    def save_position(self):
+        """重新加载前记下选中的游戏、当前游戏和第一个可见的游戏"""
+        model = self.model()
+        current = model.game_at(self.currentIndex().row()) if self.currentIndex().isValid() else None
+        top = model.game_at(self.first_visible_row())
+        self.saved_position = (
+            set(self.selected_ids),
+            current['id'] if current else None,
+            top['id'] if top else None
+        )
+
+    def restore_position(self):
+        """重新加载后按游戏ID恢复选中和滚动位置, 已不满足条件的游戏忽略"""
+        if not self.saved_position:
+            return
+        selected_ids, current_id, top_id = self.saved_position
+        self.saved_position = None
+        model = self.model()
+        rows = model.rows_of(selected_ids | {current_id, top_id} - {None})
+
+        if current_id in rows:
+            self.selectionModel().setCurrentIndex(model.index(rows[current_id]), QItemSelectionModel.NoUpdate)
+        # 连续的行合并为一个选区
+        selection = QItemSelection()
+        start = previous = None
+        for row in sorted(rows[game_id] for game_id in selected_ids if game_id in rows) + [None]:
+            if start is not None and row != previous + 1:
+                selection.select(model.index(start), model.index(previous))
+                start = None
+            if start is None:
+                start = row
+            previous = row
+        if not selection.isEmpty():
+            self.selectionModel().select(selection, QItemSelectionModel.Select)
+        if top_id in rows:
+            self.scrollTo(model.index(rows[top_id]), QAbstractItemView.PositionAtTop)
+            # 立即读取可见的块, 下次重新加载前即使没有重绘, 行号也对应本次的数据
+            model.game_at(rows[top_id])
@@ -4,184 +4,690 @@ import time
 from datetime import datetime
 from pathlib import Path
 import sqlite3
+import threading
+from bisect import bisect_left, insort
+from collections.abc import MutableMapping
 import settings
+import constants
+from search_index import SearchIndex
 from errors import FileError, DatabaseError
 import logging
 
+def backfill_filters(conn):
+    """迁移4: 从 data 中的JSON回填筛选字段和网盘表
+
+    data 用 ensure_ascii 写入, 中文键无法用 json_extract 查询, 因此在Python中解析。
+    """
+    pans = ('百度网盘', '天翼网盘', '迅雷网盘', '阿里网盘', '夸克网盘', '123网盘')
+    for game_id, data, image_url in conn.execute('SELECT id, data, image_url FROM games').fetchall():
+        other_data = json.loads(data) if data else {}
+        conn.execute(
+            'UPDATE games SET add_time = ?, has_image = ? WHERE id = ?',
+            (other_data.get('add_time', ''), 1 if image_url else 0, game_id)
+        )
+        conn.executemany(
+            'INSERT OR IGNORE INTO game_pans (pan, game_id) VALUES (?, ?)',
+            [(pan, game_id) for pan in pans if other_data.get(pan)]
+        )
+
+# 数据库结构迁移, 第 N 项将 user_version 从 N-1 升级到 N
+SCHEMA_MIGRATIONS = [
+    # 1: 游戏表
+    [
+        '''
+        CREATE TABLE IF NOT EXISTS games (
+            id TEXT PRIMARY KEY,
+            title TEXT NOT NULL,
+            url TEXT NOT NULL,
+            status TEXT DEFAULT '未采集',
+            update_time TEXT,
+            data TEXT,
+            image_url TEXT
+        )
+        '''
+    ],
+    # 2: 状态和更新时间索引
+    [
+        'CREATE INDEX IF NOT EXISTS idx_games_status ON games (status)',
+        'CREATE INDEX IF NOT EXISTS idx_games_update_time ON games (update_time)'
+    ],
+    # 3: 数字ID排序索引, 供分页 ORDER BY CAST(id AS INTEGER) 使用
+    [
+        'CREATE INDEX IF NOT EXISTS idx_games_num_id ON games (CAST(id AS INTEGER))'
+    ],
+    # 4: 筛选字段(添加时间、是否有图片)和各网盘链接表
+    [
+        "ALTER TABLE games ADD COLUMN add_time TEXT NOT NULL DEFAULT ''",
+        'ALTER TABLE games ADD COLUMN has_image INTEGER NOT NULL DEFAULT 0',
+        '''
+        CREATE TABLE IF NOT EXISTS game_pans (
+            pan TEXT NOT NULL,
+            game_id TEXT NOT NULL,
+            PRIMARY KEY (pan, game_id)
+        ) WITHOUT ROWID
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_game_pans_game ON game_pans (game_id)',
+        'CREATE INDEX IF NOT EXISTS idx_games_add_time ON games (add_time)',
+        'CREATE INDEX IF NOT EXISTS idx_games_has_image ON games (has_image)',
+        backfill_filters
+    ]
+]
+
+class GameMapping(MutableMapping):
+    """按需从数据库读取的游戏字典视图
+
+    兼容直接使用 game_list.games 的代码(in / get / [] / len), 但不在内存中保存全部游戏。
+    取出的是副本, 修改需要通过 upsert_game 保存。
+    """
+    def __init__(self, game_list):
+        self.game_list = game_list
+        
+    def __getitem__(self, game_id):
+        game = self.game_list.get_game(game_id)
+        if game is None:
+            raise KeyError(game_id)
+        return game
+        
+    def __setitem__(self, game_id, game_info):
+        self.game_list.upsert_game(game_id, game_info)
+        
+    def __delitem__(self, game_id):
+        if not self.game_list.delete_game(game_id):
+            raise KeyError(game_id)
+            
+    def __contains__(self, game_id):
+        return self.game_list.has_game(game_id)
+        
+    def __iter__(self):
+        return iter(self.game_list.get_ids())
+        
+    def __len__(self):
+        return self.game_list.count()
+
 class GameList:
-    """游戏列表管理类"""
+    """游戏列表管理类
+
+    数据保存在SQLite中, 按页查询, 内存中不保存完整的游戏列表。
+    """
+    COLUMNS = 'id, title, url, status, update_time, data, image_url'
+    INSERT_SQL = '''
+        INSERT OR {conflict} INTO games 
+        (id, title, url, status, update_time, data, image_url, add_time, has_image)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    '''
+    
     def __init__(self, site_id):
         self.site_id = site_id
-        self.games = {}
         self.db_path = settings.DATA_DIR / f'{site_id}.db'
         self.json_path = settings.DATA_DIR / f'{site_id}_games.json'
         self.logger = logging.getLogger('spider')
+        self.lock = threading.RLock()
+        self.dirty = False  # 有尚未导出到JSON快照的修改
+        self.sorted_ids = None  # 按数字ID升序的索引, 首次使用时加载
+        self.id_set = None
+        self.search_index = None  # 标题搜索索引, 首次搜索时加载
+        self.search_cache = {}  # 关键字+过滤条件的结果 {条件: ID列表}, 数据变化时清空
+        self.listeners = []  # 数据变化监听 callback(event, game_ids)
+        self.games = GameMapping(self)
         self.init_storage()
         self.load_games()
         
+    def connect(self):
+        """打开数据库连接"""
+        conn = sqlite3.connect(str(self.db_path))
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+        
     def init_storage(self):
-        """初始化存储"""
+        """初始化存储, 按 PRAGMA user_version 依次执行未应用的迁移"""
         try:
-            # 创建SQLite数据库
-            conn = sqlite3.connect(str(self.db_path))
-            cursor = conn.cursor()
-            
-            # 先删除旧表
-            cursor.execute('DROP TABLE IF EXISTS games')
-            
-            # 创建新的游戏表 - 包含image_url字段
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS games (
-                    id TEXT PRIMARY KEY,
-                    title TEXT NOT NULL,
-                    url TEXT NOT NULL,
-                    status TEXT DEFAULT '未采集',
-                    update_time TEXT,
-                    data TEXT,
-                    image_url TEXT
-                )
-            ''')
-            
-            conn.commit()
-            conn.close()
+            conn = self.connect()
+            try:
+                # WAL模式下读写互不阻塞, 设置后持久保存在数据库文件中
+                conn.execute('PRAGMA journal_mode=WAL')
+                version = conn.execute('PRAGMA user_version').fetchone()[0]
+                for target, statements in enumerate(SCHEMA_MIGRATIONS[version:], version + 1):
+                    with conn:
+                        for statement in statements:
+                            # 无法用SQL完成的数据迁移写成函数
+                            if callable(statement):
+                                statement(conn)
+                            else:
+                                conn.execute(statement)
+                        conn.execute(f'PRAGMA user_version = {target}')
+                    self.logger.info(f"数据库迁移到版本 {target}")
+            finally:
+                conn.close()
             self.logger.info(f"初始化数据库成功: {self.db_path}")
         except Exception as e:
             self.logger.error(f"初始化数据库失败: {e}")
             raise DatabaseError(f"初始化数据库失败: {e}")
         
     def load_games(self):
-        """加载游戏列表"""
+        """检查游戏列表, 数据库为空时从旧版JSON文件导入"""
         try:
-            # 优先从JSON文件加载
-            if self.json_path.exists():
-                self.logger.info(f"从JSON文件加载游戏列表: {self.json_path}")
-                with open(self.json_path, 'r', encoding='utf-8') as f:
-                    self.games = json.load(f)
-                self.logger.info(f"成功加载 {len(self.games)} 个游戏")
-                return
-                
-            # 如果JSON不存在，尝试从数据库加载
-            self.logger.info(f"从数据库加载游戏列表: {self.db_path}")
-            conn = sqlite3.connect(str(self.db_path))
-            cursor = conn.cursor()
-            cursor.execute('SELECT * FROM games')
-            rows = cursor.fetchall()
-            
-            for row in rows:
-                game_id, title, url, status, update_time, data, image_url = row
-                self.games[game_id] = {
-                    'id': game_id,
-                    'title': title,
-                    'url': url,
-                    'status': status,
-                    'time': update_time,
-                    'image_url': image_url
-                }
-                if data:
-                    self.games[game_id].update(json.loads(data))
-                    
-            conn.close()
-            self.logger.info(f"成功加载 {len(self.games)} 个游戏")
-            
-            # 保存到JSON作为备份
-            self.save_to_json()
+            total = self.count()
+            if not total and self.json_path.exists():
+                self.import_json(self.json_path)
+                total = self.count()
+            self.logger.info(f"数据库中共有 {total} 个游戏: {self.db_path}")
                 
         except Exception as e:
             self.logger.error(f"加载游戏列表失败: {e}")
             raise DatabaseError(f"加载游戏列表失败: {e}")
             
-    def save_to_json(self):
-        """保存到JSON文件"""
+    def import_json(self, path, replace=False):
+        """从JSON文件导入到数据库(旧版本只在JSON中保存完整数据)"""
+        self.logger.info(f"从JSON文件导入游戏列表: {path}")
+        with open(path, 'r', encoding='utf-8') as f:
+            games = json.load(f)
+        games = [(str(game_id), game_info) for game_id, game_info in games.items()]
+        with self.lock:
+            conn = self.connect()
+            try:
+                with conn:
+                    if replace:
+                        conn.execute('DELETE FROM games')
+                        conn.execute('DELETE FROM game_pans')
+                    self._write_games(conn, games)
+            finally:
+                conn.close()
+            self.invalidate_index()
+        self._notify('reset')
+                
+    def _sort_key(self, game_id):
+        """ID排序键, 与数据库中 CAST(id AS INTEGER) 一致"""
         try:
-            with open(self.json_path, 'w', encoding='utf-8') as f:
-                json.dump(self.games, f, ensure_ascii=False, indent=2)
-            self.logger.info(f"保存到JSON文件成功: {self.json_path}")
-        except Exception as e:
-            self.logger.error(f"保存到JSON文件失败: {e}")
+            return int(game_id)
+        except ValueError:
+            return 0
             
-    def save_games(self):
-        """保存游戏列表"""
-        try:
-            # 保存到数据库
-            conn = sqlite3.connect(str(self.db_path))
-            cursor = conn.cursor()
-            
-            for game_id, game_info in self.games.items():
-                basic_info = {
-                    'id': game_id,
-                    'title': game_info['title'],
-                    'url': game_info['url'],
-                    'status': game_info.get('status', '未采集'),
-                    'time': game_info.get('time', ''),
-                    'image_url': game_info.get('image_url', '')
-                }
+    def _load_index(self):
+        """加载排序索引, 之后只随增删增量维护"""
+        with self.lock:
+            if self.sorted_ids is None:
+                conn = self.connect()
+                try:
+                    ids = [row[0] for row in conn.execute('SELECT id FROM games')]
+                finally:
+                    conn.close()
+                self.sorted_ids = sorted((self._sort_key(game_id), game_id) for game_id in ids)
+                self.id_set = set(ids)
+            return self.sorted_ids
+            
+    def add_listener(self, callback):
+        """注册数据变化监听
+
+        callback(event, game_ids) 在修改数据的线程中调用, event 为
+        'added' / 'updated' / 'deleted' / 'reset'(整体替换, game_ids 为空)。
+        """
+        with self.lock:
+            self.listeners.append(callback)
+            
+    def remove_listener(self, callback):
+        """移除数据变化监听"""
+        with self.lock:
+            if callback in self.listeners:
+                self.listeners.remove(callback)
+                
+    def _notify(self, event, game_ids=()):
+        """通知监听者, 单个监听出错不影响其他监听和数据写入"""
+        with self.lock:
+            # 修改可能改变过滤条件是否满足, 缓存的搜索结果失效
+            self.search_cache.clear()
+            listeners = list(self.listeners)
+        for callback in listeners:
+            try:
+                callback(event, list(game_ids))
+            except Exception as e:
+                self.logger.error(f"通知数据变化失败: {e}")
                 
-                # 其他数据存储为JSON
-                other_data = {k: v for k, v in game_info.items() 
-                            if k not in basic_info}
+    def invalidate_index(self):
+        """整体替换数据后丢弃索引, 下次使用时重新加载"""
+        with self.lock:
+            self.sorted_ids = None
+            self.id_set = None
+            self.search_index = None
+            self.search_cache.clear()
+            
+    def _load_search_index(self):
+        """加载标题搜索索引"""
+        with self.lock:
+            if self.search_index is None:
+                conn = self.connect()
+                try:
+                    rows = conn.execute('SELECT id, title FROM games').fetchall()
+                finally:
+                    conn.close()
+                self.search_index = SearchIndex()
+                for game_id, title in rows:
+                    self.search_index.add(game_id, title)
+            return self.search_index
+            
+    def _index_add(self, game_id, title=None):
+        """新增或修改游戏时更新索引"""
+        with self.lock:
+            if self.sorted_ids is not None and game_id not in self.id_set:
+                insort(self.sorted_ids, (self._sort_key(game_id), game_id))
+                self.id_set.add(game_id)
+            if self.search_index is not None and title is not None:
+                self.search_index.add(game_id, title)
                 
-                cursor.execute('''
-                    INSERT OR REPLACE INTO games 
-                    (id, title, url, status, update_time, data, image_url)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    game_id,
-                    basic_info['title'],
-                    basic_info['url'],
-                    basic_info['status'],
-                    basic_info['time'],
-                    json.dumps(other_data) if other_data else None,
-                    basic_info['image_url']
-                ))
-            
-            conn.commit()
+    def _index_remove(self, game_id):
+        """删除游戏时移出索引"""
+        with self.lock:
+            if self.sorted_ids is not None and game_id in self.id_set:
+                key = (self._sort_key(game_id), game_id)
+                del self.sorted_ids[bisect_left(self.sorted_ids, key)]
+                self.id_set.discard(game_id)
+            if self.search_index is not None:
+                self.search_index.remove(game_id)
+                
+    def _to_game(self, row):
+        """数据库行转换为游戏信息"""
+        game_id, title, url, status, update_time, data, image_url = row
+        game = {
+            'id': game_id,
+            'title': title,
+            'url': url,
+            'status': status,
+            'time': update_time,
+            'image_url': image_url
+        }
+        if data:
+            game.update(json.loads(data))
+        return game
+        
+    def _query(self, sql, params=()):
+        """执行查询并转换为游戏列表"""
+        conn = self.connect()
+        try:
+            return [self._to_game(row) for row in conn.execute(sql, params)]
+        finally:
             conn.close()
-            self.logger.info(f"保存到数据库成功: {len(self.games)} 个游戏")
             
-            # 同时保存到JSON
-            self.save_to_json()
+    def _where(self, filter=None):
+        """构造过滤条件
+
+        filter 支持:
+            status: 状态或状态列表
+            pans: 网盘名称列表, 需全部有链接
+            add_time / time: (开始, 结束) 时间范围, 任一端可为None
+            has_image: 是否有图片
+        keyword 由搜索索引处理, 见 _search_ids
+        """
+        clauses, params = [], []
+        filter = filter or {}
+        
+        status = filter.get('status')
+        if status:
+            statuses = [status] if isinstance(status, str) else list(status)
+            clauses.append(f"status IN ({', '.join('?' * len(statuses))})")
+            params.extend(statuses)
             
-            # 创建备份
-            backup_path = settings.DATA_DIR / f'{self.site_id}_games_{datetime.now():%Y%m%d}.json'
-            with open(backup_path, 'w', encoding='utf-8') as f:
-                json.dump(self.games, f, ensure_ascii=False, indent=2)
-            self.logger.info(f"创建备份成功: {backup_path}")
+        for pan in filter.get('pans') or ():
+            clauses.append('id IN (SELECT game_id FROM game_pans WHERE pan = ?)')
+            params.append(pan)
+            
+        for key, column in (('add_time', 'add_time'), ('time', 'update_time')):
+            start, end = filter.get(key) or (None, None)
+            if start:
+                clauses.append(f'{column} >= ?')
+                params.append(start)
+            if end:
+                clauses.append(f'{column} <= ?')
+                params.append(end)
                 
-            return True
+        if filter.get('has_image') is not None:
+            clauses.append('has_image = ?')
+            params.append(1 if filter['has_image'] else 0)
             
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        return where, params
+        
+    def search(self, keyword, limit=None):
+        """搜索标题, 返回按相关度排序的游戏ID"""
+        return self._load_search_index().search(keyword, limit)
+        
+    def _search_ids(self, filter):
+        """关键字搜索结果, 再按其余条件过滤
+
+        结果按条件缓存, 同一条件下统计数量和逐块翻页只搜索一次; 数据变化时缓存清空。
+        """
+        key = repr(sorted(filter.items()))
+        with self.lock:
+            ids = self.search_cache.get(key)
+            if ids is None:
+                ids = self._filter_ids(filter)
+                if len(self.search_cache) >= 8:
+                    self.search_cache.clear()
+                self.search_cache[key] = ids
+            return ids
+            
+    def _filter_ids(self, filter):
+        """执行关键字搜索和其余条件的过滤"""
+        ids = self.search(filter['keyword'])
+        rest = {key: value for key, value in filter.items() if key != 'keyword'}
+        where, params = self._where(rest)
+        if not where or not ids:
+            return ids
+            
+        matched = set()
+        conn = self.connect()
+        try:
+            for i in range(0, len(ids), 500):
+                batch = ids[i:i + 500]
+                sql = f"SELECT id FROM games {where} AND id IN ({', '.join('?' * len(batch))})"
+                matched.update(row[0] for row in conn.execute(sql, params + batch))
+        finally:
+            conn.close()
+        return [game_id for game_id in ids if game_id in matched]
+        
+    def page(self, offset=0, limit=None, order='desc', filter=None):
+        """按ID排序分页查询游戏, limit 为空时返回全部
+
+        有 keyword 条件时按搜索相关度排序。
+        """
+        if filter and filter.get('keyword'):
+            ids = self._search_ids(filter)
+            end = len(ids) if limit is None else offset + limit
+            return self.get_games(ids[offset:end], keep_order=True)
+            
+        if not self._where(filter)[0] and not (filter and filter.get('keyword')):
+            # 无过滤条件时直接从排序索引切出当前页的ID
+            with self.lock:
+                ids = self._load_index()
+                total = len(ids)
+                end = total if limit is None else offset + limit
+                if order == 'asc':
+                    selected = ids[offset:end]
+                else:
+                    selected = ids[max(0, total - end):max(0, total - offset)]
+                page_ids = [game_id for _, game_id in selected]
+            games = self.get_games(page_ids)
+            return games[::-1] if order == 'asc' else games
+            
+        where, params = self._where(filter)
+        direction = 'ASC' if order == 'asc' else 'DESC'
+        sql = (f'SELECT {self.COLUMNS} FROM games {where} '
+               f'ORDER BY CAST(id AS INTEGER) {direction} LIMIT ? OFFSET ?')
+        return self._query(sql, params + [-1 if limit is None else limit, offset])
+        
+    def count(self, filter=None):
+        """统计满足条件的游戏数量"""
+        if filter and filter.get('keyword'):
+            return len(self._search_ids(filter))
+        if not self._where(filter)[0]:
+            with self.lock:
+                return len(self._load_index())
+        where, params = self._where(filter)
+        conn = self.connect()
+        try:
+            return conn.execute(f'SELECT COUNT(*) FROM games {where}', params).fetchone()[0]
+        finally:
+            conn.close()
+
+    def index_rows(self, game_ids):
+        """无过滤条件时游戏在倒序分页中的行号, 返回 (总数, {游戏ID: 行号}), 不存在的ID忽略"""
+        with self.lock:
+            ids = self._load_index()
+            total = len(ids)
+            rows = {}
+            for game_id in map(str, game_ids):
+                if game_id in self.id_set:
+                    rows[game_id] = total - 1 - bisect_left(ids, (self._sort_key(game_id), game_id))
+            return total, rows
+
+    def rows_of(self, game_ids, filter=None):
+        """游戏在 page(filter=filter) 结果中的行号 {游戏ID: 行号}, 不满足条件的ID忽略"""
+        wanted = set(map(str, game_ids))
+        if filter and filter.get('keyword'):
+            ids = self._search_ids(filter)
+        elif not self._where(filter)[0]:
+            return self.index_rows(wanted)[1]
+        else:
+            where, params = self._where(filter)
+            conn = self.connect()
+            try:
+                ids = [row[0] for row in conn.execute(
+                    f'SELECT id FROM games {where} ORDER BY CAST(id AS INTEGER) DESC', params
+                )]
+            finally:
+                conn.close()
+        return {game_id: row for row, game_id in enumerate(ids) if game_id in wanted}
+
+    def get_game(self, game_id):
+        """获取单个游戏, 不存在返回None"""
+        games = self._query(f'SELECT {self.COLUMNS} FROM games WHERE id = ?', (str(game_id),))
+        return games[0] if games else None
+        
+    def get_games(self, game_ids, keep_order=False):
+        """按ID获取多个游戏, 默认按ID倒序排列, keep_order 时保持传入顺序"""
+        game_ids = [str(game_id) for game_id in game_ids]
+        games = []
+        # SQLite单条语句的参数数量有限, 分批查询
+        for i in range(0, len(game_ids), 500):
+            batch = game_ids[i:i + 500]
+            games.extend(self._query(
+                f"SELECT {self.COLUMNS} FROM games WHERE id IN ({', '.join('?' * len(batch))})",
+                batch
+            ))
+        if keep_order:
+            position = {game_id: i for i, game_id in enumerate(game_ids)}
+            games.sort(key=lambda x: position[x['id']])
+        else:
+            games.sort(key=lambda x: (self._sort_key(x['id']), x['id']), reverse=True)
+        return games
+        
+    def has_game(self, game_id):
+        """游戏是否存在"""
+        with self.lock:
+            self._load_index()
+            return str(game_id) in self.id_set
+            
+    def get_ids(self):
+        """获取全部游戏ID, 按ID升序"""
+        with self.lock:
+            return [game_id for _, game_id in self._load_index()]
+            
+    def snapshot(self):
+        """读取全部游戏数据, 用于JSON快照和备份"""
+        return {game['id']: game for game in self.page(order='asc')}
+            
+    def save_to_json(self, path=None, games=None):
+        """保存到JSON文件"""
+        path = path or self.json_path
+        try:
+            if games is None:
+                games = self.snapshot()
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(games, f, ensure_ascii=False, indent=2)
+            self.logger.info(f"保存到JSON文件成功: {path}")
+        except Exception as e:
+            self.logger.error(f"保存到JSON文件失败: {e}")
+            
+    def _row(self, game_id, game_info):
+        """转换为数据库行"""
+        basic_info = {
+            'id': game_id,
+            'title': game_info['title'],
+            'url': game_info['url'],
+            'status': game_info.get('status', '未采集'),
+            'time': game_info.get('time', ''),
+            'image_url': game_info.get('image_url', '')
+        }
+        
+        # 其他数据存储为JSON
+        other_data = {k: v for k, v in game_info.items() 
+                    if k not in basic_info}
+        
+        return (
+            game_id,
+            basic_info['title'],
+            basic_info['url'],
+            basic_info['status'],
+            basic_info['time'],
+            json.dumps(other_data) if other_data else None,
+            basic_info['image_url'],
+            game_info.get('add_time', ''),
+            1 if basic_info['image_url'] else 0
+        )
+        
+    def _pan_rows(self, game_id, game_info):
+        """有链接的网盘, 对应 game_pans 表的行"""
+        return [(pan, game_id) for pan, _ in constants.PAN_TYPES if game_info.get(pan)]
+        
+    def _write_games(self, conn, games):
+        """写入多个游戏 [(游戏ID, 游戏信息)], 由调用方控制事务"""
+        conn.executemany(self.INSERT_SQL.format(conflict='REPLACE'),
+                         [self._row(game_id, game_info) for game_id, game_info in games])
+        conn.executemany('DELETE FROM game_pans WHERE game_id = ?',
+                         [(game_id,) for game_id, _ in games])
+        conn.executemany('INSERT OR IGNORE INTO game_pans (pan, game_id) VALUES (?, ?)',
+                         [row for game_id, game_info in games for row in self._pan_rows(game_id, game_info)])
+            
+    def save_games(self):
+        """保存游戏列表
+
+        修改已经逐条写入数据库, 这里只立即写入JSON快照和备份。
+        """
+        try:
+            self.flush()
+            return True
         except Exception as e:
             self.logger.error(f"保存游戏列表失败: {e}")
             raise DatabaseError(f"保存游戏列表失败: {e}")
             
+    def upsert_game(self, game_id, fields):
+        """更新单个游戏, 不存在时新增"""
+        return self.upsert_many({game_id: fields})
+        
+    def upsert_many(self, updates):
+        """批量更新游戏 {游戏ID: 字段}, 只在一个事务内写入变化的行
+
+        JSON快照不随修改重写, 在显式保存或关闭时导出, 见 flush。
+        """
+        try:
+            with self.lock:
+                conn = self.connect()
+                try:
+                    with conn:
+                        games = []
+                        added = []
+                        for game_id, fields in updates.items():
+                            game_id = str(game_id)
+                            row = conn.execute(
+                                f'SELECT {self.COLUMNS} FROM games WHERE id = ?', (game_id,)
+                            ).fetchone()
+                            if row:
+                                game_info = self._to_game(row)
+                            elif 'title' in fields and 'url' in fields:
+                                added.append(game_id)
+                                game_info = {
+                                    'id': game_id,
+                                    'status': '未采集',
+                                    'time': '',
+                                    'add_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                                }
+                            else:
+                                self.logger.warning(f"新增游戏缺少标题或链接: {game_id}")
+                                continue
+                            game_info.update(fields)
+                            game_info['id'] = game_id
+                            games.append((game_id, game_info))
+                        self._write_games(conn, games)
+                finally:
+                    conn.close()
+                for game_id, game_info in games:
+                    self._index_add(game_id, game_info['title'])
+                    
+            if games:
+                self.mark_dirty()
+                if added:
+                    self._notify('added', added)
+                added = set(added)
+                updated = [game_id for game_id, _ in games if game_id not in added]
+                if updated:
+                    self._notify('updated', updated)
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"更新游戏失败: {e}")
+            raise DatabaseError(f"更新游戏失败: {e}")
+            
+    def mark_dirty(self):
+        """记录有修改; 数据库已是最新, 全量的JSON快照留到保存或关闭时再导出"""
+        with self.lock:
+            self.dirty = True
+            
+    def flush(self):
+        """导出JSON快照, 当天还没有备份时同时写入当日备份"""
+        with self.lock:
+            self.dirty = False
+        games = self.snapshot()
+            
+        self.save_to_json(games=games)
+        
+        # 每天只备份一次
+        backup_path = settings.DATA_DIR / f'{self.site_id}_games_{datetime.now():%Y%m%d}.json'
+        if backup_path.exists():
+            return
+        try:
+            with open(backup_path, 'w', encoding='utf-8') as f:
+                json.dump(games, f, ensure_ascii=False, indent=2)
+            self.logger.info(f"创建备份成功: {backup_path}")
+        except Exception as e:
+            self.logger.error(f"创建备份失败: {e}")
+            
+    def close(self):
+        """退出前导出有修改的JSON快照"""
+        with self.lock:
+            pending = self.dirty
+        if pending:
+            self.flush()
+            
     def add_game(self, game_id, title, url, **kwargs):
-        """添加游戏"""
+        """添加游戏, 已存在时返回False"""
         try:
             game_id = str(game_id)
-            if game_id not in self.games:
-                self.games[game_id] = {
-                    'id': game_id,
-                    'title': title,
-                    'url': url,
-                    'status': kwargs.get('status', '未采集'),
-                    'time': kwargs.get('time', ''),
-                    'add_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                }
-                self.games[game_id].update(kwargs)
+            game_info = {
+                'id': game_id,
+                'title': title,
+                'url': url,
+                'status': kwargs.get('status', '未采集'),
+                'time': kwargs.get('time', ''),
+                'add_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            }
+            game_info.update(kwargs)
+            
+            with self.lock:
+                conn = self.connect()
+                try:
+                    with conn:
+                        cursor = conn.execute(self.INSERT_SQL.format(conflict='IGNORE'),
+                                              self._row(game_id, game_info))
+                        added = cursor.rowcount == 1
+                        if added:
+                            conn.executemany('INSERT OR IGNORE INTO game_pans (pan, game_id) VALUES (?, ?)',
+                                             self._pan_rows(game_id, game_info))
+                finally:
+                    conn.close()
+                if added:
+                    self._index_add(game_id, title)
+                    
+            if added:
+                self.mark_dirty()
+                self._notify('added', [game_id])
                 self.logger.info(f"添加游戏: {title} (ID: {game_id})")
-                return True
-            return False
+            return added
         except Exception as e:
             self.logger.error(f"添加游戏失败: {e}")
             return False
             
     def get_sorted_games(self):
-        """获取排序后的游戏列表"""
+        """获取按ID倒序排列的全部游戏, 界面分页请使用 page"""
         try:
-            sorted_games = sorted(
-                self.games.values(),
-                key=lambda x: int(x['id']),
-                reverse=True
-            )
+            sorted_games = self.page()
             self.logger.info(f"获取排序游戏列表: {len(sorted_games)} 个游戏")
             return sorted_games
         except Exception as e:
@@ -192,12 +698,22 @@ class GameList:
         """删除游戏"""
         try:
             game_id = str(game_id)
-            if game_id in self.games:
-                del self.games[game_id]
-                self.save_games()
-                self.logger.info(f"删除游戏: {game_id}")
-                return True
-            return False
+            with self.lock:
+                conn = self.connect()
+                try:
+                    with conn:
+                        deleted = conn.execute('DELETE FROM games WHERE id = ?', (game_id,)).rowcount
+                        conn.execute('DELETE FROM game_pans WHERE game_id = ?', (game_id,))
+                finally:
+                    conn.close()
+                self._index_remove(game_id)
+                    
+            if not deleted:
+                return False
+            self.mark_dirty()
+            self._notify('deleted', [game_id])
+            self.logger.info(f"删除游戏: {game_id}")
+            return True
         except Exception as e:
             self.logger.error(f"删除游戏失败: {e}")
             return False
@@ -215,12 +731,11 @@ class GameList:
             
             # 保存游戏数据
             with open(backup_file, 'w', encoding='utf-8') as f:
-                json.dump(self.games, f, ensure_ascii=False, indent=2)
+                json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
             
-            # 备份数据库文件
-            import shutil
+            # 备份数据库文件, WAL模式下直接复制文件会丢失未合并的修改, 使用SQLite在线备份
             db_backup = backup_dir / f'games_backup_{timestamp}.db'
-            shutil.copy2(self.db_path, db_backup)
+            self._copy_database(self.db_path, db_backup)
             
             # 清理旧备份
             self._clean_old_backups(backup_dir)
@@ -238,15 +753,18 @@ class GameList:
             if not backup_file.exists():
                 raise FileNotFoundError(f"备份文件不存在: {backup_file}")
             
-            # 恢复JSON数据
-            with open(backup_file, 'r', encoding='utf-8') as f:
-                self.games = json.load(f)
-            
-            # 恢复数据库
+            # 恢复数据库, 没有数据库备份时从JSON导入
             db_file = backup_file.parent / backup_file.name.replace('.json', '.db')
-            if db_file.exists():
-                import shutil
-                shutil.copy2(db_file, self.db_path)
+            with self.lock:
+                if db_file.exists():
+                    self._copy_database(db_file, self.db_path)
+                    # 备份可能来自旧版本, 需要重新迁移
+                    self.init_storage()
+                    self.invalidate_index()
+                    self._notify('reset')
+                else:
+                    self.import_json(backup_file, replace=True)
+            self.mark_dirty()
             
             self.logger.info(f"数据恢复完成: {backup_file}")
             return True
@@ -255,6 +773,16 @@ class GameList:
             self.logger.error(f"数据恢复失败: {e}")
             raise DatabaseError(f"数据恢复失败: {e}")
             
+    def _copy_database(self, source_path, target_path):
+        """使用SQLite在线备份复制数据库"""
+        source = sqlite3.connect(str(source_path))
+        target = sqlite3.connect(str(target_path))
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+            
     def _clean_old_backups(self, backup_dir, keep_count=5):
         """清理旧备份文件"""
         try:
@@ -0,0 +1,124 @@
+import copy
+import threading
+import time
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import settings
+from errors import ConfigError
+
+class TokenBucket:
+    """令牌桶限速器"""
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, self.rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        """获取令牌,不足时阻塞到令牌补充"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
+
+class HostRateLimiter:
+    """按域名分别限速"""
+    def __init__(self, rate=None, burst=None):
+        self.rate = rate or settings.SPIDER_CONFIG['rate_limit']
+        self.burst = burst or settings.SPIDER_CONFIG['rate_burst']
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def get_bucket(self, host):
+        """获取域名对应的令牌桶"""
+        with self.lock:
+            if host not in self.buckets:
+                self.buckets[host] = TokenBucket(self.rate, self.burst)
+            return self.buckets[host]
+
+    def wait(self, url):
+        """等待访问指定URL的配额"""
+        self.get_bucket(urlparse(url).netloc).acquire()
+
+# 进程内共享的限速器,保证所有采集线程对同一站点的总速率受控
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+def get_rate_limiter():
+    """获取共享限速器"""
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = HostRateLimiter()
+        return _rate_limiter
+
+def parse_cookie_string(cookie_str, domain):
+    """解析 "name=value; name2=value2" 形式的Cookie字符串"""
+    cookies = []
+    for item in cookie_str.split(';'):
+        if '=' in item:
+            name, value = item.strip().split('=', 1)
+            cookies.append({
+                'name': name,
+                'value': value,
+                'domain': domain,
+                'path': '/'
+            })
+    return cookies
+
+def create_session(pool_size=None, cookie=None, domain=None):
+    """创建带连接池和重试的会话
+
+    cookie 只对 domain 站点发送, 不会带到图片CDN、Steam等其他域名。
+    """
+    if cookie and not domain:
+        raise ConfigError("设置Cookie时需要指定所属域名")
+    pool_size = pool_size or settings.SPIDER_CONFIG['max_workers']
+    retry = Retry(
+        total=settings.REQUEST_CONFIG['retry_times'],
+        backoff_factor=settings.REQUEST_CONFIG['retry_interval'],
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=('GET', 'HEAD')
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update(settings.REQUEST_CONFIG['headers'])
+    if cookie:
+        for item in parse_cookie_string(cookie, domain):
+            session.cookies.set(item['name'], item['value'], domain=item['domain'], path=item['path'])
+    return session
+
+class HttpClient:
+    """连接复用 + 按域名限速的HTTP客户端"""
+    def __init__(self, cookie=None, pool_size=None, rate_limiter=None, domain=None):
+        self.session = create_session(pool_size, cookie, domain)
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.timeout = settings.REQUEST_CONFIG['timeout']
+
+    def with_rate_limiter(self, rate_limiter):
+        """共享连接池和Cookie, 改用另一个限速器的客户端"""
+        client = copy.copy(self)
+        client.rate_limiter = rate_limiter
+        return client
+
+    def get(self, url, **kwargs):
+        """限速后发送GET请求"""
+        self.rate_limiter.wait(url)
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session.get(url, **kwargs)
+
+    def close(self):
+        """关闭会话"""
+        self.session.close()
@@ -0,0 +1,183 @@
+import itertools
+import threading
+from PyQt5.QtCore import Qt, QObject, QRunnable, QThreadPool, QBuffer, QByteArray, QIODevice, QSize, pyqtSignal
+from PyQt5.QtGui import QImage, QPixmap
+from http_client import create_session
+from cover_cache import MemoryCache, DiskCache
+import settings
+
+def thumbnail_size():
+    """卡片上封面的尺寸"""
+    return QSize(*settings.IMAGE_CONFIG['size'])
+
+def scale_image(image):
+    """大于卡片尺寸时按比例缩小"""
+    size = thumbnail_size()
+    if image.width() <= size.width() and image.height() <= size.height():
+        return image
+    return image.scaled(size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+
+def make_thumbnail(data):
+    """解码原图并缩小到卡片尺寸, 返回压缩后的缩略图内容, 无法解码返回None"""
+    image = QImage()
+    if not image.loadFromData(data):
+        return None
+    image = scale_image(image)
+
+    buffer = QByteArray()
+    device = QBuffer(buffer)
+    device.open(QIODevice.WriteOnly)
+    if not image.save(device, settings.IMAGE_CONFIG['format'], settings.IMAGE_CONFIG['quality']):
+        return None
+    return bytes(buffer)
+
+class ImageTask(QRunnable):
+    """下载并解码一张图片
+
+    在线程池中运行, 只使用线程安全的 QImage, 转换为 QPixmap 由界面线程完成。
+    下载的原图在这里缩小为卡片尺寸的缩略图, 界面线程只解码和保存小图。
+    """
+    def __init__(self, loader, url):
+        super().__init__()
+        # 取消后由加载器丢弃, 不能让线程池删除
+        self.setAutoDelete(False)
+        self.loader = loader
+        self.url = url
+
+    def run(self):
+        # 无论成功与否都要发出完成信号, 否则加载器会一直认为该URL在加载中
+        image = QImage()
+        try:
+            data = self.loader.fetch(self.url)
+            if data and image.loadFromData(data):
+                # 旧版本缓存的是原图
+                image = scale_image(image)
+        except Exception as e:
+            print(f"加载图片失败: {self.url} {e}")
+            image = QImage()
+        finally:
+            self.loader.task_done.emit(self.url, image)
+
+class ImageLoader(QObject):
+    """共享的图片加载服务
+
+    固定大小的线程池, 同一URL同时只下载一次; 后请求的优先(通常是当前可见的卡片),
+    不再需要的请求可以取消。
+    解码后的图片保存在有大小上限的内存缓存中, 下载的图片保存在磁盘缓存中,
+    再次启动时已看过的封面不需要联网。
+    """
+    image_loaded = pyqtSignal(str)  # 加载成功, 可通过 pixmap(URL) 读取
+    image_failed = pyqtSignal(str)  # 加载失败: URL
+
+    # 线程池线程通过此信号回到界面线程
+    task_done = pyqtSignal(str, QImage)
+
+    def __init__(self, max_workers=None, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_workers or settings.IMAGE_CONFIG['max_workers'])
+        self.session = create_session(self.pool.maxThreadCount())
+        self.memory = MemoryCache()
+        self.disk = DiskCache()
+        self.tasks = {}  # 未完成的请求 {URL: 任务}
+        self.priority = itertools.count()
+        self.task_done.connect(self.on_task_done)
+
+    def pixmap(self, url):
+        """已加载的图片, 不在内存缓存中返回None"""
+        return self.memory.get(url)
+
+    def fetch(self, url):
+        """在线程池中读取缩略图内容
+
+        优先使用磁盘缓存; 缓存过期时带 ETag/Last-Modified 向服务器校验,
+        网络失败时仍使用过期的缓存。下载的原图只保存缩略图。
+        """
+        try:
+            entry = self.disk.lookup(url)
+            if entry and not self.disk.is_stale(entry):
+                self.disk.touch(url)
+                return self.disk.read(entry)
+
+            headers = {}
+            if entry and entry['etag']:
+                headers['If-None-Match'] = entry['etag']
+            if entry and entry['last_modified']:
+                headers['If-Modified-Since'] = entry['last_modified']
+        except Exception as e:
+            print(f"读取封面缓存失败: {url} {e}")
+            entry, headers = None, {}
+
+        try:
+            response = self.session.get(url, headers=headers, timeout=settings.REQUEST_CONFIG['timeout'])
+            if response.status_code == 304 and entry:
+                self.disk.touch(url, checked=True)
+                return self.disk.read(entry)
+            thumbnail = make_thumbnail(response.content) if response.status_code == 200 else None
+            if thumbnail:
+                self.disk.store(
+                    url,
+                    thumbnail,
+                    response.headers.get('ETag'),
+                    response.headers.get('Last-Modified')
+                )
+                return thumbnail
+            print(f"下载图片失败: {url} 状态码: {response.status_code}")
+        except Exception as e:
+            print(f"下载图片失败: {url} {e}")
+
+        if entry:
+            # 网络失败时使用过期的缓存, 缓存文件也可能已被删除
+            try:
+                return self.disk.read(entry)
+            except Exception as e:
+                print(f"读取封面缓存失败: {url} {e}")
+        return None
+
+    def request(self, url):
+        """请求加载图片, 已在队列中的请求提到最前"""
+        task = self.tasks.get(url)
+        if task is not None:
+            # 还在排队则重新排到最前, 已开始下载的不处理
+            if self.pool.tryTake(task):
+                self.pool.start(task, next(self.priority))
+            return
+        task = ImageTask(self, url)
+        self.tasks[url] = task
+        self.pool.start(task, next(self.priority))
+
+    def cancel(self, url):
+        """取消还在排队的请求, 已开始下载的会正常完成"""
+        task = self.tasks.get(url)
+        if task is not None and self.pool.tryTake(task):
+            del self.tasks[url]
+
+    def cancel_all(self):
+        """取消全部排队中的请求"""
+        for url in list(self.tasks):
+            self.cancel(url)
+
+    def is_pending(self, url):
+        """是否正在加载"""
+        return url in self.tasks
+
+    def on_task_done(self, url, image):
+        """下载完成"""
+        self.tasks.pop(url, None)
+        if image.isNull():
+            self.image_failed.emit(url)
+        else:
+            self.memory.put(url, QPixmap.fromImage(image))
+            self.image_loaded.emit(url)
+
+# 进程内共享的图片加载器
+_image_loader = None
+_image_loader_lock = threading.Lock()
+
+def get_image_loader():
+    """获取共享图片加载器, 需在界面线程中首次调用"""
+    global _image_loader
+    with _image_loader_lock:
+        if _image_loader is None:
+            _image_loader = ImageLoader()
+        return _image_loader
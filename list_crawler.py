@@ -0,0 +1,98 @@
+from concurrent.futures import ThreadPoolExecutor
+import requests
+import settings
+
+class ListCrawler:
+    """列表页并发采集引擎
+
+    page_url(page) 返回列表页地址, parse_page(html) 返回该页的游戏列表。
+    页面并发抓取, 但按页码顺序返回结果。
+    """
+    def __init__(self, client, page_url, parse_page, max_workers=None):
+        self.client = client
+        self.page_url = page_url
+        self.parse_page = parse_page
+        self.max_workers = max_workers or settings.SPIDER_CONFIG['max_workers']
+
+    def fetch_page(self, page):
+        """抓取并解析单个列表页, 失败返回None"""
+        url = self.page_url(page)
+        print(f"正在获取第{page}页游戏列表: {url}")
+        try:
+            response = self.client.get(url)
+            if response.status_code != 200:
+                print(f"获取第{page}页失败，状态码: {response.status_code}")
+                return None
+            return self.parse_page(response.text)
+        except requests.RequestException as e:
+            print(f"获取第{page}页请求异常: {e}")
+            return None
+        except Exception as e:
+            print(f"解析第{page}页失败: {e}")
+            return None
+
+    def iter_pages(self, start_page, end_page, window=None):
+        """按页码顺序产出 (page, games)
+
+        window() 返回当前允许的在途页数, 默认始终为 max_workers。
+        """
+        pages = iter(range(start_page, end_page + 1))
+        pending = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            try:
+                while True:
+                    limit = window() if window else self.max_workers
+                    while len(pending) < limit:
+                        page = next(pages, None)
+                        if page is None:
+                            break
+                        pending.append((page, executor.submit(self.fetch_page, page)))
+                    if not pending:
+                        break
+
+                    page, future = pending.pop(0)
+                    yield page, future.result()
+            finally:
+                # 调用方提前停止时取消尚未开始的请求
+                for _, future in pending:
+                    future.cancel()
+
+    def crawl(self, start_page=1, end_page=10, stop_on_empty=False, known_ids=None, overlap=None):
+        """采集页码范围内的游戏
+
+        stop_on_empty: 遇到空页或失败页即停止
+        known_ids: 已有游戏ID集合, 传入时为增量模式 —— 列表按新到旧排列,
+                   连续 overlap 页全部是已知游戏即停止
+        """
+        incremental = known_ids is not None
+        if overlap is None:
+            overlap = settings.SPIDER_CONFIG['incremental_overlap']
+        known_pages = 0
+        # 增量模式下在途页数从1开始, 整页都是新游戏才翻倍预取,
+        # 一旦出现已知游戏说明接近边界, 回到逐页抓取
+        window = {'limit': 1}
+
+        games = []
+        pages = self.iter_pages(start_page, end_page, window=(lambda: window['limit']) if incremental else None)
+        for page, page_games in pages:
+            if not page_games:
+                if stop_on_empty:
+                    print(f"第{page}页没有找到游戏，可能是最后一页")
+                    break
+                continue
+            print(f"第{page}页找到 {len(page_games)} 个游戏")
+            games.extend(page_games)
+
+            if incremental:
+                known = sum(1 for game in page_games if game['id'] in known_ids)
+                if known == len(page_games):
+                    known_pages += 1
+                    if known_pages >= overlap:
+                        print(f"第{page}页全部为已有游戏，增量更新结束")
+                        break
+                else:
+                    known_pages = 0
+                window['limit'] = min(window['limit'] * 2, self.max_workers) if known == 0 else 1
+
+        print(f"总共获取到 {len(games)} 个游戏")
+        return games
@@ -1,7 +1,7 @@
 import sys
 import os
 from PyQt5.QtWidgets import QApplication, QMessageBox
-from PyQt5.QtCore import QThread
+from PyQt5.QtCore import QThread, QTimer
 from main_window import MainWindow
 from logger import Logger
 import settings
@@ -64,7 +64,7 @@ class Application(QApplication):
             return False
             
     def init_browser_pool(self):
-        """初始化浏览器池"""
+        """初始化浏览器池, 浏览器在第一次使用时才启动"""
         try:
             pool_size = settings.BROWSER_CONFIG['pool_size']
             Browser.init_pool(pool_size)
@@ -78,11 +78,21 @@ class Application(QApplication):
                 print(f"初始化浏览器池失败: {e}")
             return False
             
+    def warm_up_browsers(self):
+        """主窗口显示后在后台预先启动浏览器"""
+        count = settings.BROWSER_CONFIG['warm_up']
+        if count > 0:
+            Browser.warm_up(count)
+            if self.logger:
+                self.logger.info(f"后台预启动浏览器({count}个)")
+            
     def cleanup(self):
         """清理资源"""
         try:
             # 关闭所有浏览器
             if Browser._pool:
+                if self.logger:
+                    self.logger.info(f"浏览器池统计: {Browser._pool.stats()}")
                 Browser._pool.close_all()
                 
             # 停止所有工作线程
@@ -134,6 +144,8 @@ def main():
         try:
             app.main_window = MainWindow()
             app.main_window.show()
+            # 等事件循环开始、窗口绘制完成后再启动浏览器
+            QTimer.singleShot(0, app.warm_up_browsers)
         except Exception as e:
             error_msg = f"创建主窗口失败: {str(e)}\n{traceback.format_exc()}"
             app.logger.error(error_msg)
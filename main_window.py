@@ -1,9 +1,10 @@
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
-                           QPushButton, QLabel, QLineEdit, QGridLayout,
-                           QScrollArea, QFrame, QMessageBox, QApplication,
-                           QProgressBar, QCheckBox, QMenu, QAction, QFileDialog)
+                           QPushButton, QLabel, QLineEdit, QAbstractItemView,
+                           QMessageBox, QApplication,
+                           QProgressBar, QCheckBox, QMenu, QAction, QFileDialog,
+                           QComboBox)
 from PyQt5.QtCore import Qt, QTimer
-from PyQt5.QtGui import QPixmap, QIcon
+from PyQt5.QtGui import QPixmap
 import constants
 import settings
 from utils import load_cookie, save_cookie
@@ -16,326 +17,15 @@ from workers.fast_list_worker import FastListWorker
 from workers.data_worker import DataWorker
 from ui.log_window import LogWindow
 from game_list import GameList
+from game_grid import GameGridModel, GameGridView
+from checkpoint import CheckpointJournal
+from steam_lookup import close_steam_lookup
 import os
 from ui.game_detail_dialog import GameDetailDialog
 import time
+from datetime import datetime, timedelta
 from ui.admin_panel import AdminPanel
 import requests
-from ui.image_cache import ImageCache, ImageLoadWorker
-
-class GameCard(QFrame):
-    """游戏卡片组件"""
-    def __init__(self, game_info, parent=None):
-        super().__init__(parent)
-        self.game_info = game_info
-        self.image_size = (220, 165)
-        self.selected = False
-        self.initUI()
-        self.setContextMenuPolicy(Qt.CustomContextMenu)
-        self.customContextMenuRequested.connect(self.showContextMenu)
-        self.setFocusPolicy(Qt.NoFocus)
-        
-    def initUI(self):
-        """初始化UI"""
-        self.setStyleSheet('''
-            QFrame {
-                background-color: white;
-                border: none;
-                outline: none;
-            }
-            QFrame:hover {
-                background-color: #f0f0f0;
-            }
-            QFrame:focus {
-                outline: none;
-            }
-        ''')
-        self.setFixedSize(230, 300)
-        
-        layout = QVBoxLayout()
-        layout.setContentsMargins(5, 5, 5, 5)
-        layout.setSpacing(5)
-        
-        # 游戏图片
-        self.image_label = QLabel()
-        self.image_label.setFixedSize(*self.image_size)
-        self.image_label.setAlignment(Qt.AlignCenter)
-        self.loadImage()
-        layout.addWidget(self.image_label)
-        
-        # 游戏标题
-        title = QLabel(self.game_info['title'])
-        title.setAlignment(Qt.AlignCenter)
-        title.setWordWrap(True)
-        title.setStyleSheet('font-size: 12px;')
-        title.setFixedHeight(40)
-        layout.addWidget(title)
-        
-        # 网盘按钮组
-        buttons_layout = QHBoxLayout()
-        buttons_layout.setSpacing(5)
-        buttons_layout.setAlignment(Qt.AlignCenter)
-        for pan_type, name in constants.PAN_TYPES:
-            if pan_type in self.game_info:
-                btn = QPushButton(QIcon(f'icons/{pan_type}.png'), '')
-                btn.setFixedSize(35, 35)
-                btn.setToolTip(name)
-                btn.setStyleSheet('QPushButton { border: none; }')
-                btn.clicked.connect(lambda x, url=self.game_info[pan_type]: self.copyLink(url))
-                buttons_layout.addWidget(btn)
-        layout.addLayout(buttons_layout)
-        
-        self.setLayout(layout)
-        
-        # 设置鼠标追踪
-        self.setMouseTracking(True)
-        
-    def loadImage(self):
-        """加载游戏图片"""
-        try:
-            if 'image_url' in self.game_info and self.game_info['image_url']:
-                # 使用图片缓存
-                cache_key = self.game_info['image_url']
-                if cache_key in ImageCache.cache:
-                    self.image_label.setPixmap(ImageCache.cache[cache_key])
-                    return
-                
-                # 异步加载图片
-                self.image_worker = ImageLoadWorker(self.game_info['image_url'])
-                self.image_worker.finished.connect(self.onImageLoaded)
-                self.image_worker.start()
-                
-                # 显示加载占位图
-                self.image_label.setPixmap(ImageCache.placeholder)
-                
-        except Exception as e:
-            print(f"加载图片失败: {str(e)}")
-            self.image_label.setPixmap(ImageCache.default)
-        
-    def onImageLoaded(self, image_path):
-        """图片加载完成"""
-        try:
-            if image_path:
-                # 重新加载图片
-                self.loadImage()
-                self.updateLog(f"图片更新成功: {image_path}")
-            else:
-                self.updateLog("图片更新失败")
-                
-            # 隐藏进度条
-            self.progress_bar.hide()
-            
-        except Exception as e:
-            print(f"处理图片更新结果失败: {str(e)}")
-            if self.progress_bar:
-                self.progress_bar.hide()
-
-    def mousePressEvent(self, event):
-        """鼠标按下事件"""
-        if event.button() == Qt.LeftButton:
-            # 获取主窗口
-            main_window = self.get_main_window()
-            if main_window:
-                # 如果按住了Ctrl键，则进入多选模式
-                if event.modifiers() & Qt.ControlModifier:
-                    self.toggleSelection()
-                # 如果按住了Shift键，则进入范围选择模式
-                elif event.modifiers() & Qt.ShiftModifier:
-                    main_window.selection_start = True
-                    main_window.last_selected = self
-                    self.toggleSelection()
-                # 否则就是单选模式
-                else:
-                    # 清除其他选中状态
-                    for i in range(main_window.grid_layout.count()):
-                        widget = main_window.grid_layout.itemAt(i).widget()
-                        if isinstance(widget, GameCard) and widget != self and widget.selected:
-                            widget.selected = False
-                            widget.updateStyle()
-                    # 切换当前卡片的选择状态
-                    self.toggleSelection()
-        super().mousePressEvent(event)
-        
-    def mouseReleaseEvent(self, event):
-        """鼠标释放事件"""
-        if event.button() == Qt.LeftButton:
-            # 获取主窗口
-            main_window = self.get_main_window()
-            if main_window:
-                # 结束选择操作
-                main_window.selection_start = False
-        super().mouseReleaseEvent(event)
-        
-    def mouseMoveEvent(self, event):
-        """鼠标移动事件"""
-        # 获取主窗口
-        main_window = self.get_main_window()
-        if main_window and main_window.selection_start:
-            # 如果正在进行选择操作，则选中当前卡片
-            if not self.selected:
-                self.toggleSelection()
-        super().mouseMoveEvent(event)
-        
-    def toggleSelection(self):
-        """切换选中状态"""
-        self.selected = not self.selected
-        self.updateStyle()
-        # 通知主窗口选择状态改变
-        self.parent().parent().parent().updateSelection()
-        
-    def updateStyle(self):
-        """更新样式"""
-        if self.selected:
-            self.setStyleSheet('''
-                QFrame {
-                    background-color: #e0e0e0;
-                    outline: none;
-                }
-            ''')
-        else:
-            self.setStyleSheet('''
-                QFrame {
-                    background-color: white;
-                    border: none;
-                    outline: none;
-                }
-                QFrame:hover {
-                    background-color: #f0f0f0;
-                }
-                QFrame:focus {
-                    outline: none;
-                }
-            ''')
-        
-    def showContextMenu(self, pos):
-        """显示右键菜单"""
-        menu = QMenu(self)
-        main_window = self.get_main_window()
-        
-        if main_window:
-            # 获取选中的游戏数量
-            selected_count = len(main_window.selected_games)
-            
-            if selected_count > 1 and self.selected:
-                # 如果有多个选中且当前卡片被选中，显示批量操作选项
-                update_action = QAction(f'更新选中的 {selected_count} 个游戏图片', self)
-                update_action.triggered.connect(main_window.updateSelectedImages)
-                menu.addAction(update_action)
-                
-                download_action = QAction(f'下载选中的 {selected_count} 个游戏详情', self)
-                download_action.triggered.connect(main_window.downloadSelectedGamesData)
-                menu.addAction(download_action)
-                
-                delete_action = QAction(f'删除选中的 {selected_count} 个游戏', self)
-                delete_action.triggered.connect(main_window.deleteSelectedGames)
-                menu.addAction(delete_action)
-            else:
-                # 单个游戏操作
-                update_action = QAction('更新图片', self)
-                update_action.triggered.connect(self.updateImage)
-                menu.addAction(update_action)
-                
-                download_action = QAction('下载游戏详情', self)
-                download_action.triggered.connect(self.downloadGameData)
-                menu.addAction(download_action)
-                
-                delete_action = QAction('删除游戏', self)
-                delete_action.triggered.connect(self.deleteGame)
-                menu.addAction(delete_action)
-            
-            menu.exec_(self.mapToGlobal(pos))
-        
-    def get_main_window(self):
-        """获取主窗口实例"""
-        widget = self
-        while widget:
-            if isinstance(widget, MainWindow):
-                return widget
-            widget = widget.parent()
-        return None
-        
-    def updateImage(self):
-        """更新单个游戏图片"""
-        try:
-            main_window = self.get_main_window()
-            if main_window:
-                # 显示进度条
-                main_window.progress_bar.setMaximum(0)
-                main_window.progress_bar.show()
-                
-                # 创建Steam图片搜索线程
-                from test_steam_search import SteamImageTest
-                searcher = SteamImageTest()
-                
-                # 搜索游戏图片URL
-                image_url = searcher.search_game(self.game_info['title'])
-                if image_url:
-                    # 更新游戏信息中的图片URL
-                    self.game_info['image_url'] = image_url
-                    # 保存更新
-                    main_window.game_list.save_games()
-                    # 重新加载图片
-                    self.loadImage()
-                    main_window.updateLog(f"图片URL更新成功: {image_url}")
-                else:
-                    main_window.updateLog("未找到游戏图片")
-                
-                # 隐藏进度条
-                main_window.progress_bar.hide()
-                
-        except Exception as e:
-            print(f"更新图片失败: {str(e)}")
-            
-    def deleteGame(self):
-        """删除游戏"""
-        main_window = self.get_main_window()
-        if main_window:
-            main_window.deleteGame(self.game_info)
-
-    def mouseDoubleClickEvent(self, event):
-        """双击事件处理"""
-        if event.button() == Qt.LeftButton:
-            dialog = GameDetailDialog(self.game_info, self)
-            dialog.exec_()
-
-    def downloadGameData(self):
-        """下载单个游戏详情"""
-        try:
-            main_window = self.get_main_window()
-            if main_window:
-                # 显示进度条
-                main_window.progress_bar.setMaximum(0)
-                main_window.progress_bar.show()
-                
-                # 创建数据下载线程，传入当前游戏信息
-                self.data_worker = DataWorker(game_info=self.game_info)
-                self.data_worker.progress.connect(main_window.updateLog)
-                self.data_worker.game_found.connect(lambda game_info: self.onGameDataDownloaded(game_info, main_window))
-                self.data_worker.finished.connect(lambda: main_window.progress_bar.hide())
-                
-                # 开始下载
-                self.data_worker.start()
-                
-        except Exception as e:
-            main_window.updateLog(f"下载游戏详情失败: {str(e)}")
-            main_window.progress_bar.hide()
-
-    def onGameDataDownloaded(self, game_info, main_window):
-        """游戏详情下载完成"""
-        try:
-            # 更新游戏信息
-            if game_info:
-                self.game_info.update(game_info)
-                main_window.game_list.save_games()
-                main_window.updateLog(f"游戏详情下载完成: {self.game_info['title']}")
-                
-                # 刷新显示
-                main_window.loadGames()
-            else:
-                main_window.updateLog("游戏详情下载失败")
-                
-        except Exception as e:
-            main_window.updateLog(f"处理游戏详情失败: {str(e)}")
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -345,14 +35,15 @@ class MainWindow(QMainWindow):
         self.batch_image_worker = None
         self.list_worker = None  # 添加列表获取线程
         self.current_page = 1
+        self.search_filter = None  # 当前搜索条件
         self.cards_per_page = settings.UI_CONFIG['cards_per_page']  # 从配置文件获取每页显示数量
         self.search_timer = QTimer()
         self.search_timer.setSingleShot(True)
         self.search_timer.timeout.connect(self.performSearch)
         self.selected_games = set()  # 添加选中游戏集合
-        self.selection_start = False  # 是否正在进行选择操作
-        self.last_selected = None  # 最后选中的卡片
         self.admin_panel = None  # 添加管理面板引用
+        self.data_journal = CheckpointJournal('data_worker')  # 数据采集断点
+        self.replayDataCheckpoint()
         self.initUI()
         
     def initUI(self):
@@ -382,20 +73,23 @@ class MainWindow(QMainWindow):
         content_layout.setSpacing(10)
         content_layout.setContentsMargins(10, 10, 10, 10)
         
-        # 创建网格布局容器
-        self.grid_widget = QWidget()
-        self.grid_layout = QGridLayout(self.grid_widget)
-        self.grid_layout.setSpacing(15)
-        self.grid_layout.setContentsMargins(0, 0, 0, 0)
-        
-        # 创建滚动区域
-        self.scroll = QScrollArea()
-        self.scroll.setWidget(self.grid_widget)
-        self.scroll.setWidgetResizable(True)
-        self.scroll.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
-        self.scroll.setVerticalScrollBarPolicy(Qt.ScrollBarAsNeeded)
-        
-        content_layout.addWidget(self.scroll)
+        # 游戏网格, 只绘制可见的卡片
+        self.game_model = GameGridModel(self.game_list, self)
+        self.game_view = GameGridView()
+        self.game_view.setModel(self.game_model)
+        self.game_view.selectionModel().selectionChanged.connect(self.updateSelection)
+        self.game_view.customContextMenuRequested.connect(self.showGameContextMenu)
+        self.game_view.doubleClicked.connect(self.openGameDetail)
+        self.game_view.delegate.link_clicked.connect(self.copyLink)
+        self.game_view.verticalScrollBar().valueChanged.connect(self.onScroll)
+        # 游戏增删后模型会自动插入行或重新加载, 同步页码和选中状态
+        self.game_model.modelReset.connect(self.updatePageInfo)
+        self.game_model.modelReset.connect(self.updateSelection)
+        self.game_model.rowsInserted.connect(self.updatePageInfo)
+        # 视图在 reloaded 时恢复选中, 之后再同步
+        self.game_model.reloaded.connect(self.updateSelection)
+        
+        content_layout.addWidget(self.game_view)
         main_layout.addWidget(content_widget)
         
         # 底部分页控制
@@ -472,6 +166,28 @@ class MainWindow(QMainWindow):
         
         control_layout.addLayout(search_layout)
         
+        # 筛选条件
+        self.status_filter = QComboBox()
+        self.status_filter.addItem('全部状态', None)
+        for status in ('未采集', '已采集'):
+            self.status_filter.addItem(status, status)
+        self.pan_filter = QComboBox()
+        self.pan_filter.addItem('全部网盘', None)
+        for pan_type, name in constants.PAN_TYPES:
+            self.pan_filter.addItem(name, pan_type)
+        self.image_filter = QComboBox()
+        self.image_filter.addItem('全部图片', None)
+        self.image_filter.addItem('有图片', True)
+        self.image_filter.addItem('无图片', False)
+        self.date_filter = QComboBox()
+        self.date_filter.addItem('全部时间', None)
+        self.date_filter.addItem('今天添加', 0)
+        self.date_filter.addItem('本周添加', 7)
+        self.date_filter.addItem('本月添加', 30)
+        for combo in (self.status_filter, self.pan_filter, self.image_filter, self.date_filter):
+            combo.currentIndexChanged.connect(self.performSearch)
+            control_layout.addWidget(combo)
+        
         # 更新图片按钮
         self.update_images_button = QPushButton('更新图片')
         self.update_images_button.clicked.connect(self.startUpdateSelectedImages)
@@ -485,81 +201,59 @@ class MainWindow(QMainWindow):
         top_layout.addLayout(control_layout)
         return top_layout
         
-    def loadGames(self, games=None, reset=True):
-        """加载游戏列表"""
+    def loadGames(self, reset=False):
+        """按当前条件重新加载游戏网格
+
+        reset 为True时回到第一页, 否则保持滚动位置。
+        """
         try:
-            # 清空网格布局中的所有内容
-            self.clearGrid()
-            
-            if games is None:
-                games = self.game_list.get_sorted_games()
-                
-            # 计算总页数和当前页范围
-            total_games = len(games)
-            total_pages = (total_games + self.cards_per_page - 1) // self.cards_per_page
-            
-            # 确保当前页不超过总页数
-            self.current_page = min(self.current_page, max(1, total_pages))
-            
-            # 计算当前页的游戏范围
-            start_idx = (self.current_page - 1) * self.cards_per_page
-            end_idx = min(start_idx + self.cards_per_page, total_games)
-            page_games = games[start_idx:end_idx]
-            
-            # 计算网格布局
-            cols = settings.UI_CONFIG['grid_columns']
-            row = col = 0
-            
-            # 添加游戏卡片
-            for game in page_games:
-                card = GameCard(game)
-                self.grid_layout.addWidget(card, row, col)
-                col += 1
-                if col >= cols:
-                    col = 0
-                    row += 1
+            self.game_model.set_filter(self.search_filter)
+            # 重新加载会清空视图的选中状态
+            self.selected_games.clear()
             
-            # 更新页码按钮
-            self.updatePageButtons(total_pages)
-            
-            # 更新总数信息
-            self.total_info_label.setText(f'共 {total_pages} 页 ({total_games} 个游戏)')
-            
-            # 更新按钮状态
-            self.prev_button.setEnabled(self.current_page > 1)
-            self.next_button.setEnabled(self.current_page < total_pages)
-            
-            # 滚动到顶部
-            self.scroll.verticalScrollBar().setValue(0)
+            if reset:
+                self.current_page = 1
+                self.game_view.scrollToTop()
+            self.updatePageInfo()
             
         except Exception as e:
             self.updateLog(f"加载游戏列表失败: {str(e)}")
-
-    def clearGrid(self):
-        """清空网格布局"""
-        while self.grid_layout.count():
-            item = self.grid_layout.takeAt(0)
-            if item.widget():
-                item.widget().deleteLater()
+            
+    def totalPages(self):
+        """总页数"""
+        return max(1, (self.game_model.rowCount() + self.cards_per_page - 1) // self.cards_per_page)
+        
+    def updatePageInfo(self):
+        """更新页码按钮和总数信息"""
+        total_pages = self.totalPages()
+        self.current_page = min(self.current_page, total_pages)
+        
+        # 更新页码按钮
+        self.updatePageButtons(total_pages)
+        
+        # 更新总数信息
+        self.total_info_label.setText(f'共 {total_pages} 页 ({self.game_model.rowCount()} 个游戏)')
+        
+        # 更新按钮状态
+        self.prev_button.setEnabled(self.current_page > 1)
+        self.next_button.setEnabled(self.current_page < total_pages)
 
     def prevPage(self):
         """上一页"""
         if self.current_page > 1:
-            self.current_page -= 1
-            self.loadGames()  # 移reset=False参数
+            self.gotoPage(self.current_page - 1)
 
     def nextPage(self):
         """下一页"""
-        total_games = len(self.game_list.get_sorted_games())
-        total_pages = (total_games + self.cards_per_page - 1) // self.cards_per_page
-        
-        if self.current_page < total_pages:
-            self.current_page += 1
-            self.loadGames()  # 移除reset=False参数
+        if self.current_page < self.totalPages():
+            self.gotoPage(self.current_page + 1)
 
     def onScroll(self, value):
-        """除滚动加载"""
-        pass
+        """滚动时按可见的第一行更新当前页"""
+        page = self.game_view.first_visible_row() // self.cards_per_page + 1
+        if page != self.current_page:
+            self.current_page = page
+            self.updatePageInfo()
 
     def onSearchInput(self, text):
         """索输入处理"""
@@ -568,27 +262,33 @@ class MainWindow(QMainWindow):
         
     def performSearch(self):
         """执行搜索"""
-        text = self.search_input.text().lower()
-        games = self.game_list.get_sorted_games()
+        self.search_filter = self.buildFilter()
+        self.loadGames(reset=True)
         
+    def buildFilter(self):
+        """根据搜索框和筛选条件构造查询条件"""
+        filter = {}
+        text = self.search_input.text().strip()
         if text:
-            games = [
-                game for game in games
-                if text in game['title'].lower()
-            ]
-            
-        self.loadGames(games)
+            filter['keyword'] = text
+        if self.status_filter.currentData():
+            filter['status'] = self.status_filter.currentData()
+        if self.pan_filter.currentData():
+            filter['pans'] = [self.pan_filter.currentData()]
+        if self.image_filter.currentData() is not None:
+            filter['has_image'] = self.image_filter.currentData()
+        days = self.date_filter.currentData()
+        if days is not None:
+            start = datetime.now() - timedelta(days=days)
+            filter['add_time'] = (start.strftime('%Y-%m-%d 00:00:00'), None)
+        return filter or None
         
     def startUpdateSelectedImages(self, games=None):
         """更新选中或指定游戏的图片"""
         try:
             if games is None:
                 # 获取选中的游戏
-                games = []
-                for i in range(self.grid_layout.count()):
-                    widget = self.grid_layout.itemAt(i).widget()
-                    if isinstance(widget, GameCard) and widget.selected:
-                        games.append(widget.game_info)
+                games = self.game_list.get_games(self.selected_games)
         
             if not games:
                 QMessageBox.information(
@@ -624,8 +324,8 @@ class MainWindow(QMainWindow):
             value = self.progress_bar.value() + 1
             self.progress_bar.setValue(value)
             
-            # 刷新显示
-            self.loadGames()
+            # 只重绘这个游戏的卡片
+            self.refresh_game(game_id)
         except Exception as e:
             self.updateLog(f"更新显示失败: {str(e)}")
 
@@ -635,7 +335,6 @@ class MainWindow(QMainWindow):
         self.updateLog("所有游戏图片更新完成")
         # 更新完图片后自动备份
         self.autoBackupData()
-        self.loadGames()
 
     def showLogWindow(self):
         """显日志窗口"""
@@ -695,15 +394,13 @@ class MainWindow(QMainWindow):
     def onGameFound(self, game_info):
         """发现新游戏"""
         try:
-            # 添加到游戏列表并立即保存
-            if self.game_list.add_game(
-                game_info['id'],
-                game_info['title'],
-                game_info['url']
-            ):
+            # 添加到游戏列表, 只写入新增的这一行
+            if str(game_info['id']) not in self.game_list.games:
+                self.game_list.upsert_game(game_info['id'], {
+                    'title': game_info['title'],
+                    'url': game_info['url']
+                })
                 self.updateLog(f"添加新游戏: {game_info['title']}")
-                # 立即保存到数据库
-                self.game_list.save_games()
                 
         except Exception as e:
             self.updateLog(f"添加游戏失败: {str(e)}")
@@ -719,8 +416,6 @@ class MainWindow(QMainWindow):
                 if hasattr(self, 'admin_panel') and self.admin_panel:
                     self.admin_panel.stop_btn.setEnabled(False)
                 
-            # 重新加载游戏列表
-            self.loadGames()
             # 自动备份
             self.autoBackupData()
             self.updateLog("游戏列表更新完成")
@@ -728,14 +423,116 @@ class MainWindow(QMainWindow):
         except Exception as e:
             self.updateLog(f"完成列表获取失败: {str(e)}")
 
-    def updateSelection(self):
+    def updateSelection(self, selected=None, deselected=None):
         """更新选中状态"""
-        self.selected_games.clear()
-        for i in range(self.grid_layout.count()):
-            widget = self.grid_layout.itemAt(i).widget()
-            if isinstance(widget, GameCard) and widget.selected:
-                self.selected_games.add(widget.game_info['id'])
-                self.updateLog(f"选中游戏: {widget.game_info['title']}")
+        indexes = self.game_view.selectionModel().selectedIndexes()
+        self.selected_games = set(self.game_model.game_ids(indexes))
+        
+    def showGameContextMenu(self, pos):
+        """显示游戏右键菜单"""
+        index = self.game_view.indexAt(pos)
+        game_info = index.data(Qt.UserRole) if index.isValid() else None
+        if not game_info:
+            return
+            
+        menu = QMenu(self)
+        selected_count = len(self.selected_games)
+        
+        if selected_count > 1 and game_info['id'] in self.selected_games:
+            # 如果有多个选中且当前卡片被选中，显示批量操作选项
+            update_action = QAction(f'更新选中的 {selected_count} 个游戏图片', self)
+            update_action.triggered.connect(self.updateSelectedImages)
+            menu.addAction(update_action)
+            
+            download_action = QAction(f'下载选中的 {selected_count} 个游戏详情', self)
+            download_action.triggered.connect(self.downloadSelectedGamesData)
+            menu.addAction(download_action)
+            
+            delete_action = QAction(f'删除选中的 {selected_count} 个游戏', self)
+            delete_action.triggered.connect(self.deleteSelectedGames)
+            menu.addAction(delete_action)
+        else:
+            # 单个游戏操作
+            update_action = QAction('更新图片', self)
+            update_action.triggered.connect(lambda: self.updateGameImage(game_info))
+            menu.addAction(update_action)
+            
+            download_action = QAction('下载游戏详情', self)
+            download_action.triggered.connect(lambda: self.downloadGameData(game_info))
+            menu.addAction(download_action)
+            
+            delete_action = QAction('删除游戏', self)
+            delete_action.triggered.connect(lambda: self.deleteGame(game_info))
+            menu.addAction(delete_action)
+        
+        menu.exec_(self.game_view.viewport().mapToGlobal(pos))
+        
+    def openGameDetail(self, index):
+        """双击显示游戏详情"""
+        game_info = index.data(Qt.UserRole)
+        if game_info:
+            dialog = GameDetailDialog(game_info, self)
+            dialog.exec_()
+            
+    def updateGameImage(self, game_info):
+        """更新单个游戏图片"""
+        try:
+            # 显示进度条
+            self.progress_bar.setMaximum(0)
+            self.progress_bar.show()
+            
+            # 创建Steam图片搜索线程
+            from test_steam_search import SteamImageTest
+            searcher = SteamImageTest()
+            
+            # 搜索游戏图片URL
+            image_url = searcher.search_game(game_info['title'])
+            if image_url:
+                # 只保存这一条
+                self.game_list.upsert_game(game_info['id'], {'image_url': image_url})
+                self.updateLog(f"图片URL更新成功: {image_url}")
+            else:
+                self.updateLog("未找到游戏图片")
+            
+            # 隐藏进度条
+            self.progress_bar.hide()
+            
+        except Exception as e:
+            print(f"更新图片失败: {str(e)}")
+            
+    def downloadGameData(self, game_info):
+        """下载单个游戏详情"""
+        try:
+            # 显示进度条
+            self.progress_bar.setMaximum(0)
+            self.progress_bar.show()
+            
+            # 创建数据下载线程，传入当前游戏信息
+            self.game_data_worker = DataWorker(game_info=game_info)
+            self.game_data_worker.progress.connect(self.updateLog)
+            self.game_data_worker.game_found.connect(
+                lambda result: self.onGameDataDownloaded(game_info, result))
+            self.game_data_worker.finished.connect(lambda: self.progress_bar.hide())
+            
+            # 开始下载
+            self.game_data_worker.start()
+            
+        except Exception as e:
+            self.updateLog(f"下载游戏详情失败: {str(e)}")
+            self.progress_bar.hide()
+
+    def onGameDataDownloaded(self, game_info, result):
+        """游戏详情下载完成"""
+        try:
+            # 更新游戏信息
+            if result:
+                self.game_list.upsert_game(game_info['id'], result)
+                self.updateLog(f"游戏详情下载完成: {game_info['title']}")
+            else:
+                self.updateLog("游戏详情下载失败")
+                
+        except Exception as e:
+            self.updateLog(f"处理游戏详情失败: {str(e)}")
                 
     def updateSingleImage(self, game_info):
         """更新单个游戏图片"""
@@ -765,8 +562,8 @@ class MainWindow(QMainWindow):
             # 隐藏进度条
             self.progress_bar.hide()
             
-            # 刷新显示
-            self.loadGames()
+            # 只重绘这个游戏的卡片
+            self.refresh_game(game_id)
             
         except Exception as e:
             self.updateLog(f"更新显示失败: {str(e)}")
@@ -791,7 +588,6 @@ class MainWindow(QMainWindow):
                 if os.path.exists(image_path):
                     os.remove(image_path)
                 self.updateLog(f"已删除游戏: {game_info['title']}")
-                self.loadGames()
             except Exception as e:
                 self.updateLog(f"删除游戏失败: {str(e)}")
                 
@@ -799,10 +595,7 @@ class MainWindow(QMainWindow):
         """更新选中的游戏图片"""
         try:
             # 获取选中的戏
-            selected_games = []
-            for game in self.game_list.get_sorted_games():
-                if game['id'] in self.selected_games:
-                    selected_games.append(game)
+            selected_games = self.game_list.get_games(self.selected_games)
             
             if selected_games:
                 # 显示进度条
@@ -843,7 +636,6 @@ class MainWindow(QMainWindow):
                         os.remove(image_path)
                 self.updateLog(f"已删除 {count} 个游戏")
                 self.selected_games.clear()
-                self.loadGames()
             except Exception as e:
                 self.updateLog(f"删除游戏失败: {str(e)}")
 
@@ -890,19 +682,19 @@ class MainWindow(QMainWindow):
             self.page_buttons_layout.addWidget(btn)
 
     def gotoPage(self, page):
-        """跳转到指定页"""
-        if page != self.current_page:
+        """滚动到指定页的第一个游戏"""
+        row = (page - 1) * self.cards_per_page
+        if 0 <= row < self.game_model.rowCount():
             self.current_page = page
-            self.loadGames()
+            self.game_view.scrollTo(self.game_model.index(row), QAbstractItemView.PositionAtTop)
+            self.updatePageInfo()
 
-    def mouseMoveEvent(self, event):
-        """鼠标移动事件"""
-        if self.selection_start:
-            # 获取鼠标下的部件
-            widget = self.childAt(event.pos())
-            if isinstance(widget, GameCard) and not widget.selected:
-                widget.toggleSelection()
-        super().mouseMoveEvent(event)
+    def closeEvent(self, event):
+        """关闭窗口前写入延迟保存的数据"""
+        self.game_model.close()
+        self.game_list.close()
+        close_steam_lookup()
+        super().closeEvent(event)
 
     def showAdminPanel(self):
         """显示管理面板"""
@@ -913,9 +705,10 @@ class MainWindow(QMainWindow):
     def startDownloadGameData(self):
         """开始下载游戏数据"""
         try:
-            # 获取所有未采集的游戏
-            uncollected_games = [game for game in self.game_list.get_sorted_games() 
-                               if game.get('status') == '未采集']
+            # 获取所有未采集的游戏, 跳过断点中已采集的
+            collected = self.data_journal.load()
+            uncollected_games = [game for game in self.game_list.page(filter={'status': '未采集'})
+                               if game['id'] not in collected]
             
             if not uncollected_games:
                 self.updateLog("没有需要采集的游戏")
@@ -994,17 +787,18 @@ class MainWindow(QMainWindow):
 
     def onDataDownloadFinished(self):
         """数据下载完成"""
-        self.updateLog("游戏数据下载完成")
-        self.loadGames()  # 刷新显示
+        # 正常完成时结果已逐个保存到游戏列表, 断点不再需要; 被停止时保留, 下次从断点继续
+        if self.sender().is_running:
+            self.data_journal.clear()
+            self.updateLog("游戏数据下载完成")
+        else:
+            self.updateLog("游戏数据下载已停止, 下次从断点继续")
 
     def downloadSelectedGamesData(self):
         """下载选中游戏的详情"""
         try:
             # 获取选中的游戏
-            selected_games = []
-            for game in self.game_list.get_sorted_games():
-                if game['id'] in self.selected_games:
-                    selected_games.append(game)
+            selected_games = self.game_list.get_games(self.selected_games)
             
             if selected_games:
                 reply = QMessageBox.question(
@@ -1037,10 +831,12 @@ class MainWindow(QMainWindow):
     def onGameDataCollected(self, game_info):
         """游戏数据采集完成"""
         try:
+            # 先写入断点, 保证中断后可以恢复
+            self.data_journal.append(game_info['id'], game_info)
+            
             # 更新游戏列表中的游戏信息
             if game_info['id'] in self.game_list.games:
-                self.game_list.games[game_info['id']].update(game_info)
-                self.game_list.save_games()  # 保存更新
+                self.game_list.upsert_game(game_info['id'], game_info)  # 只更新这一行
                 self.updateLog(f"更新游戏数据: {game_info['title']}")
                 
                 # 更新进度条
@@ -1050,6 +846,20 @@ class MainWindow(QMainWindow):
         except Exception as e:
             self.updateLog(f"新游戏数据失败: {str(e)}")
 
+    def replayDataCheckpoint(self):
+        """重放上次中断前已采集的游戏数据"""
+        try:
+            collected = {
+                game_id: game_info
+                for game_id, game_info in self.data_journal.load().items()
+                if game_id in self.game_list.games
+            }
+            if collected:
+                self.game_list.upsert_many(collected)
+                self.updateLog(f"从断点恢复 {len(collected)} 个游戏数据")
+        except Exception as e:
+            self.updateLog(f"恢复采集断点失败: {str(e)}")
+
     def autoBackupData(self):
         """自动备份数据"""
         try:
@@ -1077,44 +887,8 @@ class MainWindow(QMainWindow):
             print(msg)
 
     def refresh_game(self, game_id):
-        """刷新单个游戏的显示"""
+        """刷新单个游戏的显示, 同一帧内的多次刷新会合并"""
         try:
-            # 如果有游戏列表视图，刷新对应项
-            if hasattr(self, 'game_list_view'):
-                # 找到对应的游戏项并更新
-                for i in range(self.game_list_view.count()):
-                    item = self.game_list_view.item(i)
-                    if item and item.data(Qt.UserRole).get('id') == game_id:
-                        # 从game_list获取最新数据
-                        game_info = self.game_list.games.get(game_id)
-                        if game_info:
-                            # 更新item的数据
-                            item.setData(Qt.UserRole, game_info)
-                            # 如果需要，更新显示
-                            self.updateGameItem(item)
-                        break
-                    
-            # 如果当前显示的是这个游戏的详情，也要刷新
-            if hasattr(self, 'current_game_id') and self.current_game_id == game_id:
-                self.showGameDetail(game_id)
-            
-            self.updateLog(f"刷新游戏显示: {game_id}")
-            
-        except Exception as e:
-            self.updateLog(f"刷新游戏显示失败: {str(e)}")
-
-    def updateGameItem(self, item):
-        """更新游戏列表项显示"""
-        try:
-            game_info = item.data(Qt.UserRole)
-            if game_info:
-                # 更新显示文本
-                item.setText(game_info['title'])
-                
-                # 如果有图片URL，加载图片
-                if 'image_url' in game_info and game_info['image_url']:
-                    # 这里可以添加图片加载逻辑
-                    pass
-                    
+            self.game_model.on_games_changed('updated', [str(game_id)])
         except Exception as e:
-            self.updateLog(f"更新游戏项显示失败: {str(e)}")
\ No newline at end of file
+            self.updateLog(f"刷新游戏显示失败: {str(e)}")
\ No newline at end of file
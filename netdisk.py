@@ -1,22 +1,41 @@
 from browser import Browser
+from transfer_resolver import get_resolver
 from selenium.webdriver.common.by import By
-import time
+
+# 中转页所在站点
+SITE_DOMAIN = 'www.sanmoganme.com'
 
 class NetDisk(Browser):
     def __init__(self):
         super().__init__()
         
-    def get_download_info(self, url, cookie=None):
-        """获取下载信息"""
+    def get_download_info(self, url, cookie=None, browser_slots=None):
+        """获取下载信息, 优先直接解析中转页HTML, 失败时使用浏览器
+
+        browser_slots 为信号量时, 使用浏览器前先取得名额, 避免并发线程多于浏览器池
+        时在池上等待租用超时。
+        """
+        result = get_resolver(cookie, SITE_DOMAIN).resolve(url)
+        if result:
+            return result
+        if browser_slots is None:
+            return self.get_download_info_browser(url, cookie)
+        with browser_slots:
+            return self.get_download_info_browser(url, cookie)
+        
+    def get_download_info_browser(self, url, cookie=None):
+        """使用浏览器获取下载信息"""
         try:
-            self.init_driver()
+            # 借出的浏览器已注入过Cookie时不再重复注入
+            self.init_driver(SITE_DOMAIN, cookie)
             self.driver.get(url)
-            time.sleep(3)
+            self.wait_for_network_idle()
             
-            if cookie:
-                self.add_cookie(cookie, 'www.sanmoganme.com')
+            if cookie and self.is_logged_out():
+                # 登录已失效, 重新注入后刷新一次
+                self.add_cookie(cookie, SITE_DOMAIN, force=True)
                 self.driver.refresh()
-                time.sleep(3)
+                self.wait_for_network_idle()
             
             # 获取提取码和解压码
             result = {
@@ -37,6 +56,10 @@ class NetDisk(Browser):
         finally:
             self.close_driver()
             
+    def is_logged_out(self):
+        """中转页没有下载按钮, 通常是未登录"""
+        return not self.driver.find_elements(By.CSS_SELECTOR, "#download-page a.empty.button")
+            
     def get_extract_code(self):
         """获取提取码"""
         try:
@@ -54,21 +77,34 @@ class NetDisk(Browser):
             return "XDGAME"
             
     def get_download_url(self):
-        """获取下载链接"""
+        """获取下载链接, 读完后关闭弹出的窗口并切回原窗口"""
+        old_handles = None
         try:
             download_link = self.wait_for_element(By.CSS_SELECTOR, "#download-page a.empty.button")
-            current_window = self.driver.current_window_handle
+            original_handle = self.driver.current_window_handle
+            old_handles = self.driver.window_handles
             
             self.driver.execute_script("arguments[0].click();", download_link)
-            time.sleep(3)
             
-            for window_handle in self.driver.window_handles:
-                if window_handle != current_window:
-                    self.driver.switch_to.window(window_handle)
-                    break
-                    
-            return self.driver.current_url
+            # 切换到新窗口, 等它离开空白页
+            self.driver.switch_to.window(self.wait_for_new_window(old_handles))
+            return self.wait_for_url_change('about:blank')
             
         except Exception as e:
             print(f"获取下载链接失败: {e}")
-            return None 
\ No newline at end of file
+            return None
+        finally:
+            # 浏览器会归还到池中复用, 不能留下弹出的窗口
+            if old_handles is not None:
+                self.close_new_windows(old_handles, original_handle)
+
+    def close_new_windows(self, old_handles, original_handle):
+        """关闭 old_handles 之外的窗口, 切回原窗口"""
+        try:
+            for handle in self.driver.window_handles:
+                if handle not in old_handles:
+                    self.driver.switch_to.window(handle)
+                    self.driver.close()
+            self.driver.switch_to.window(original_handle)
+        except Exception as e:
+            print(f"关闭弹出窗口失败: {e}")
\ No newline at end of file
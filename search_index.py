@@ -0,0 +1,202 @@
+import re
+import threading
+import unicodedata
+from collections import Counter, OrderedDict, defaultdict
+
+try:
+    # 可选依赖, 安装后支持拼音和拼音首字母搜索
+    from pypinyin import lazy_pinyin, Style
+except ImportError:
+    lazy_pinyin = None
+
+# 标题分段: "中文名/English Name" 以及常见分隔符
+SEGMENT_PATTERN = re.compile(r'[/|／\\\s\-_:：·,，、()（）\[\]【】]+')
+CJK_PATTERN = re.compile(r'[一-鿿]')
+
+def normalize(text):
+    """统一全角半角和大小写"""
+    return unicodedata.normalize('NFKC', text or '').lower()
+
+def segments(text):
+    """切分为中文名、英文名和其中的单词"""
+    return [part for part in SEGMENT_PATTERN.split(normalize(text)) if part]
+
+def grams(text, n=2):
+    """生成字符n-gram, 不足n个字符时返回本身"""
+    if len(text) <= n:
+        return {text} if text else set()
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+def pinyin_keys(text):
+    """中文部分的全拼和首字母"""
+    if lazy_pinyin is None or not CJK_PATTERN.search(text):
+        return []
+    chars = ''.join(CJK_PATTERN.findall(text))
+    return [
+        ''.join(lazy_pinyin(chars)),
+        ''.join(lazy_pinyin(chars, style=Style.FIRST_LETTER))
+    ]
+
+def title_keys(title):
+    """标题的全部可检索文本: 各分段、分段拼接和拼音"""
+    parts = segments(title)
+    keys = set(parts)
+    keys.add(''.join(parts))
+    for part in parts:
+        keys.update(pinyin_keys(part))
+    return keys
+
+class SearchIndex:
+    """标题的内存二元组倒排索引
+
+    中文名和英文名分别建索引, 安装 pypinyin 后额外索引全拼和首字母。
+    查询按二元组命中比例打分, 少量错字也能匹配; 标题直接包含查询文字的排在最前。
+    """
+    # 查询二元组至少命中的比例
+    MIN_SCORE = 0.5
+    # 缓存的查询结果数量
+    MAX_CACHED = 32
+
+    def __init__(self):
+        self.postings = defaultdict(set)
+        self.char_postings = defaultdict(set)  # 单字倒排, 用于单字查询
+        self.titles = {}
+        self.keys = {}
+        self.sort_keys = {}  # {游戏ID: 数字ID}, 排序用
+        # 完整排序结果 {查询分段: ID列表}, 索引变化时清空
+        self.results = OrderedDict()
+        self.version = 0
+        self.lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.titles)
+
+    def add(self, game_id, title):
+        """新增或更新一个标题"""
+        game_id = str(game_id)
+        with self.lock:
+            if self.titles.get(game_id) == title:
+                return
+            self.remove(game_id)
+            keys = title_keys(title)
+            game_grams = set()
+            game_chars = set()
+            for key in keys:
+                game_grams.update(grams(key))
+                game_chars.update(key)
+            for gram in game_grams:
+                self.postings[gram].add(game_id)
+            for char in game_chars:
+                self.char_postings[char].add(game_id)
+            self.titles[game_id] = title
+            self.keys[game_id] = (' '.join(keys), game_grams, game_chars)
+            self.sort_keys[game_id] = sort_key(game_id)
+            self.changed()
+
+    def remove(self, game_id):
+        """移除一个标题"""
+        game_id = str(game_id)
+        with self.lock:
+            if game_id not in self.titles:
+                return
+            _, game_grams, game_chars = self.keys.pop(game_id)
+            del self.sort_keys[game_id]
+            for index, values in ((self.postings, game_grams), (self.char_postings, game_chars)):
+                for value in values:
+                    postings = index.get(value)
+                    if postings:
+                        postings.discard(game_id)
+                        if not postings:
+                            del index[value]
+            del self.titles[game_id]
+            self.changed()
+            
+    def changed(self):
+        """索引变化, 丢弃缓存的查询结果"""
+        self.version += 1
+        self.results.clear()
+
+    def search(self, query, limit=None):
+        """搜索标题, 返回按相关度排序的游戏ID列表
+
+        完整排序结果按查询缓存, 翻页和统计数量不会重复搜索; 索引变化时缓存失效。
+        """
+        parts = tuple(segments(query))
+        if not parts:
+            return []
+        with self.lock:
+            result = self.results.get(parts)
+            if result is None:
+                result = self.rank(parts)
+                self.results[parts] = result
+                while len(self.results) > self.MAX_CACHED:
+                    self.results.popitem(last=False)
+            else:
+                self.results.move_to_end(parts)
+        return result[:limit] if limit else list(result)
+        
+    def rank(self, parts):
+        """按相关度排序全部匹配的游戏, 需持有锁
+
+        查询按分段分别匹配, 每段都需命中, 避免 "game 19" 这类查询被常见词匹配到全部游戏。
+        单字分段通过单字倒排直接取得包含它的游戏。
+        """
+        gram_parts = [(part, grams(part)) for part in parts if len(part) >= 2]
+        short_parts = [part for part in parts if len(part) < 2]
+        
+        candidates = None
+        for part in short_parts:
+            ids = self.char_postings.get(part, set())
+            candidates = set(ids) if candidates is None else candidates & ids
+            
+        part_hits = []
+        for part, part_grams in gram_parts:
+            hits = Counter()
+            for gram in part_grams:
+                hits.update(self.postings.get(gram, ()))
+            part_hits.append(hits)
+        if part_hits:
+            # 从命中最少的分段取候选
+            fewest = min(part_hits, key=len).keys()
+            candidates = set(fewest) if candidates is None else candidates & fewest
+            
+        if not gram_parts:
+            # 只有单字分段, 候选都包含这些字
+            return self.order(candidates)
+            
+        scores = {}
+        for game_id in candidates:
+            keys = self.keys[game_id][0]
+            if all(part in keys for part, _ in gram_parts):
+                scores[game_id] = 2.0
+                continue
+            if short_parts:
+                continue
+            # 分段较短时要求全部命中, 否则允许部分错字
+            ratios = []
+            for (part, part_grams), hits in zip(gram_parts, part_hits):
+                ratio = hits.get(game_id, 0) / len(part_grams)
+                if ratio < (1.0 if len(part_grams) < 3 else self.MIN_SCORE):
+                    break
+                ratios.append(ratio)
+            else:
+                scores[game_id] = sum(ratios) / len(ratios)
+                
+        buckets = defaultdict(list)
+        for game_id, score in scores.items():
+            buckets[score].append(game_id)
+        result = []
+        for score in sorted(buckets, reverse=True):
+            result.extend(self.order(buckets[score]))
+        return result
+        
+    def order(self, game_ids):
+        """相关度相同时较新的游戏(ID较大)在前"""
+        return sorted(game_ids, key=self.sort_keys.__getitem__, reverse=True)
+
+def sort_key(game_id):
+    """数字ID排序键"""
+    try:
+        return int(game_id)
+    except ValueError:
+        return 0
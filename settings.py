@@ -21,9 +21,33 @@ BROWSER_CONFIG = {
     'no_sandbox': True,
     'disable_dev_shm': True,
     'disable_images': True,
-    'pool_size': 3,  # 浏览器池大小
+    'pool_size': 3,  # 浏览器池大小(上限)
+    'pool_min': 0,  # 空闲时至少保留的浏览器数量
+    'lease_timeout': 60,  # 没有空闲浏览器时最多等待的秒数
+    'idle_timeout': 300,  # 空闲超过秒数的浏览器被关闭
+    'max_uses': 50,  # 借出次数达到后重启浏览器
+    'max_age': 30,  # 运行分钟数达到后重启浏览器
+    'health_check_idle': 60,  # 空闲超过秒数的浏览器借出前先检查是否可用
+    'scraping_profile': True,  # 采集用浏览器屏蔽字体、样式、视频和统计广告, 只加载HTML和脚本
+    'page_load_strategy': 'eager',  # DOM解析完成即返回, 不等待图片等资源
+    'blocked_urls': [
+        '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+        '*.css',
+        '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico',
+        '*.mp4', '*.webm', '*.m3u8', '*.flv', '*.mp3',
+        '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*',
+        '*googlesyndication.com*', '*hm.baidu.com*', '*cnzz.com*', '*51.la*'
+    ],
+    # 按站点放行的规则 {域名: [blocked_urls中的规则]}, 页面依赖这些资源时使用
+    'allowed_urls': {},
+    'warm_up': 1,  # 主窗口显示后在后台预先启动的浏览器数量, 0 表示用到时再启动
     'page_load_timeout': 30,
-    'implicit_wait': 10
+    'implicit_wait': 10,
+    'wait_timeout': 10,  # 等待元素、新窗口、跳转的默认超时秒数
+    'wait_poll': 0.2,  # 等待条件的检查间隔
+    'redirect_timeout': 5,  # 等待中转页跳转的超时秒数
+    'network_idle_time': 0.5,  # 没有新请求持续多久视为网络空闲
+    'network_idle_timeout': 10  # 等待网络空闲的最长秒数, 超时后继续执行
 }
 
 # 请求配置
@@ -43,7 +67,15 @@ SPIDER_CONFIG = {
     'delay': (2, 4),  # 随机延迟范围
     'batch_size': 10,  # 批量采集数量
     'max_failed': 3,   # 最大失败次数
-    'max_workers': 10  # 最大线程数
+    'max_workers': 10,  # 最大线程数
+    'rate_limit': 2,   # 每个域名每秒请求数
+    'rate_burst': 4,   # 每个域名允许的突发请求数
+    'incremental_overlap': 1,  # 增量更新时连续多少页全为已有游戏才停止
+    'parallel_pans': True,  # 并发解析同一游戏的各网盘中转页
+    # 中转页单独限速, 不占用上面的配额; 突发数约为一个游戏全部网盘的请求数(每个网盘约2个),
+    # 使单个游戏的解析时间取决于最慢的网盘。代价是对站点的总请求速率最多为两者之和
+    'transfer_rate_limit': 2,  # 中转页每秒请求数
+    'transfer_rate_burst': 12  # 中转页允许的突发请求数
 }
 
 # 图片配置
@@ -51,6 +83,13 @@ IMAGE_CONFIG = {
     'size': (220, 165),
     'quality': 95,
     'format': 'JPEG',
+    'max_workers': 4,  # 同时下载的封面数量
+    'memory_cache_mb': 64,  # 内存中解码后封面的上限
+    'disk_cache_mb': 200,  # 磁盘封面缓存的上限
+    'revalidate_days': 7,  # 超过天数的缓存在使用时向服务器校验
+    'steam_negative_days': 7,  # Steam上没找到的标题, 超过天数后重新查询
+    'steam_match_threshold': 0.7,  # Steam搜索结果与标题的最低相似度, 低于此值视为没找到
+    'steam_save_interval': 30,  # 单个查询后写入Steam缓存文件的最短间隔(秒), 退出时写入剩余的
     'search_keywords': [
         '{english} steam cover',
         '{english} game cover art',
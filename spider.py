@@ -4,12 +4,19 @@ import pandas as pd
 import time
 import random
 from selenium.webdriver.common.by import By
-import requests
 import os
 import json
+from list_crawler import ListCrawler
+from http_client import HttpClient
+from detail_parser import DetailPage
+from transfer_resolver import TransferResolver
+from browser import (
+    apply_scraping_options, apply_scraping_profile, inject_cookies,
+    wait_for_selector, wait_for_new_window, wait_for_url_change
+)
+from netdisk import SITE_DOMAIN
+import settings
 import undetected_chromedriver as uc
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 
 class XDGameSpider(BaseSpider):
     """小刀游戏爬虫"""
@@ -17,53 +24,59 @@ class XDGameSpider(BaseSpider):
         self.driver = None
         self.data = []  # 用于存储采集的数据
         
-    def get_game_list(self, start_page=1, end_page=10):
-        """获取游戏列表"""
-        games = []
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        
+    def get_game_list(self, start_page=1, end_page=10, existing_games=None):
+        """获取游戏列表, 传入已有游戏时只增量获取新游戏"""
         try:
-            for page in range(start_page, end_page + 1):
-                url = f"{self.base_url}/list/1/list_{page}.html" if page > 1 else f"{self.base_url}/list/1/"
-                print(f"正在获取第{page}页游戏列表: {url}")
-                
-                response = requests.get(url, headers=headers)
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    game_links = soup.find_all('a', class_='tit')
-                    
-                    for link in game_links:
-                        try:
-                            title = link.text.strip()
-                            url = link.get('href', '')
-                            if url:
-                                if not url.startswith('http'):
-                                    url = self.base_url + url
-                                game_id = url.split('/')[-1].replace('.html', '')
-                                games.append({
-                                    'id': game_id,
-                                    'title': title,
-                                    'url': url
-                                })
-                                print(f"找到游戏: {title} ({url})")
-                        except Exception as e:
-                            print(f"提取游戏信息失败: {e}")
-                            continue
-                
-                time.sleep(0.5)
-                
+            crawler = ListCrawler(self.get_http_client(), self.list_page_url, self.parse_list_page)
+            return crawler.crawl(start_page, end_page, known_ids=existing_games)
         except Exception as e:
             print(f"获取游戏列表失败: {e}")
-            
+            return []
+
+    def list_page_url(self, page):
+        """列表页地址"""
+        return f"{self.base_url}/list/1/list_{page}.html" if page > 1 else f"{self.base_url}/list/1/"
+
+    def parse_list_page(self, html):
+        """解析列表页"""
+        games = []
+        soup = BeautifulSoup(html, 'html.parser')
+        game_links = soup.find_all('a', class_='tit')
+        
+        for link in game_links:
+            try:
+                title = link.text.strip()
+                url = link.get('href', '')
+                if url:
+                    if not url.startswith('http'):
+                        url = self.base_url + url
+                    game_id = url.split('/')[-1].replace('.html', '')
+                    games.append({
+                        'id': game_id,
+                        'title': title,
+                        'url': url
+                    })
+                    print(f"找到游戏: {title} ({url})")
+            except Exception as e:
+                print(f"提取游戏信息失败: {e}")
+                continue
+                
         return games
 
     def parse_detail_page(self, url):
-        """解析详情页"""
+        """解析详情页, 优先使用HTTP解析, 校验失败时使用浏览器"""
+        page = self.fetch_detail_page(url)
+        if page is None:
+            return self.parse_detail_page_browser(url)
+        
+        result = page.parse()
+        result.update(self.extract_download_info(url, page.download_button_count()))
+        return result
+
+    def parse_detail_page_browser(self, url):
+        """使用浏览器解析详情页"""
         try:
             self.driver.get(url)
-            time.sleep(2)
             
             result = {
                 '标题': '',
@@ -82,9 +95,9 @@ class XDGameSpider(BaseSpider):
             # 使用配置中的选择器
             selectors = self.config.get('selectors', {})
             
-            # 提取标题
+            # 提取标题, 标题出现即页面已加载
             try:
-                title_element = self.driver.find_element(By.CSS_SELECTOR, selectors.get('title', 'h1'))
+                title_element = wait_for_selector(self.driver, selectors.get('title', 'h1'))
                 result['标题'] = title_element.text.strip()
             except Exception as e:
                 print(f"提取标题失败: {e}")
@@ -120,8 +133,8 @@ class XDGameSpider(BaseSpider):
             print(f"解析详情页失败: {e}")
             return None
 
-    def extract_download_info(self, url):
-        """提取下载信息"""
+    def extract_download_info(self, url, button_count=None):
+        """提取下载信息, button_count 为空时从浏览器当前页统计下载按钮"""
         game_id = url.split('/')[-1].replace('.html', '')
         result = {
             '百度网盘': '',
@@ -134,26 +147,20 @@ class XDGameSpider(BaseSpider):
         
         try:
             # 获取所有下载按钮
-            buttons = self.driver.find_elements(By.CSS_SELECTOR, self.config['selectors']['download_buttons'])
-            
-            for i, button in enumerate(buttons):
-                try:
-                    # 构建中转页URL
-                    transfer_url = f"{self.base_url}/download?post_id={game_id}&index=0&i={i}"
-                    self.driver.get(transfer_url)
-                    time.sleep(1)
-                    
-                    # 获取实际下载链接
-                    current_url = self.driver.current_url
-                    
-                    # 根据按钮顺序保存到对应网盘
-                    pan_types = ['百度网盘', '天翼网盘', '迅雷网盘', '阿里网盘', '夸克网盘', '123网盘']
-                    if i < len(pan_types):
-                        result[pan_types[i]] = current_url
-                        
-                except Exception as e:
-                    print(f"获取第{i+1}个下载链接失败: {e}")
-                    continue
+            if button_count is None:
+                button_count = len(self.driver.find_elements(By.CSS_SELECTOR, self.config['selectors']['download_buttons']))
+            
+            # 根据按钮顺序保存到对应网盘
+            pan_types = ['百度网盘', '天翼网盘', '迅雷网盘', '阿里网盘', '夸克网盘', '123网盘']
+            transfer_urls = [
+                f"{self.base_url}/download?post_id={game_id}&index=0&i={i}"
+                for i in range(min(button_count, len(pan_types)))
+            ]
+            
+            # 获取实际下载链接
+            for pan_type, current_url in zip(pan_types, self.resolve_transfer_urls(transfer_urls)):
+                if current_url:
+                    result[pan_type] = current_url
                     
         except Exception as e:
             print(f"提取下载信息失败: {e}")
@@ -211,6 +218,8 @@ class SanmoSpider:
         self.driver = None
         self.progress = None
         self.cookie = None
+        self.http_client = None
+        self.transfer_resolver = None
         
     def load_config(self):
         """加载配置"""
@@ -239,7 +248,10 @@ class SanmoSpider:
         if not self.driver:
             options = uc.ChromeOptions()
             options.add_argument('--window-size=1920,1080')
+            if settings.BROWSER_CONFIG['scraping_profile']:
+                apply_scraping_options(options)
             self.driver = uc.Chrome(options=options)
+            apply_scraping_profile(self.driver, SITE_DOMAIN)
     
     def close_driver(self):
         """关闭浏览器"""
@@ -257,7 +269,7 @@ class SanmoSpider:
             try:
                 url = self.config['selectors']['list_url'].format(page=page) if page > 1 else self.config['selectors']['list_first_url']
                 self.driver.get(url)
-                time.sleep(2)
+                wait_for_selector(self.driver, self.config['selectors']['game_link'])
                 
                 soup = BeautifulSoup(self.driver.page_source, 'html.parser')
                 game_links = soup.select(self.config['selectors']['game_link'])
@@ -281,16 +293,33 @@ class SanmoSpider:
                 
         return games
     
+    def get_http_client(self):
+        """获取复用连接的HTTP客户端"""
+        if self.http_client is None:
+            self.http_client = HttpClient(cookie=self.cookie, domain=SITE_DOMAIN)
+        return self.http_client
+
     def parse_detail_page(self, url):
-        """解析详情页"""
+        """解析详情页, 优先使用HTTP解析, 校验失败时使用浏览器"""
+        try:
+            response = self.get_http_client().get(url)
+            if response.status_code == 200:
+                page = DetailPage(response.text, url, self.config['selectors'])
+                if page.is_valid():
+                    result = {'标题': page.text('title')}
+                    result.update(page.download_links())
+                    return result
+        except Exception as e:
+            print(f"HTTP解析页面失败: {e}")
+        return self.parse_detail_page_browser(url)
+
+    def parse_detail_page_browser(self, url):
+        """使用浏览器解析详情页"""
         try:
             self.driver.get(url)
-            time.sleep(2)
             
             # 获取标题
-            title = WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.TAG_NAME, self.config['selectors']['title']))
-            ).text.strip()
+            title = wait_for_selector(self.driver, self.config['selectors']['title'], By.TAG_NAME).text.strip()
             
             # 获取下载链接
             result = {'标题': title}
@@ -319,7 +348,19 @@ class SanmoSpider:
             print(f"数据已保存到: {filename}")
 
     def get_download_link(self, transfer_url):
-        """获取下载链接"""
+        """获取下载链接, 优先直接解析中转页HTML, 失败时使用浏览器"""
+        if self.transfer_resolver is None:
+            self.transfer_resolver = TransferResolver(client=self.get_http_client())
+        info = self.transfer_resolver.resolve(transfer_url)
+        if info:
+            self.progress.emit(f"提取码: {info['提取码']}")
+            self.progress.emit(f"解压码: {info['解压码']}")
+            self.progress.emit(f"跳转后URL: {info['下载链接']}")
+            return info['下载链接'], info['提取码'], info['解压码']
+        return self.get_download_link_browser(transfer_url)
+
+    def get_download_link_browser(self, transfer_url):
+        """使用浏览器获取下载链接"""
         driver = None
         try:
             # 初始化浏览器
@@ -333,26 +374,21 @@ class SanmoSpider:
                 }
             }
             options.add_experimental_option('prefs', prefs)
+            if settings.BROWSER_CONFIG['scraping_profile']:
+                apply_scraping_options(options)
             
             driver = uc.Chrome(options=options)
+            apply_scraping_profile(driver, SITE_DOMAIN)
+            
+            # 打开页面前注入cookie, 不需要先访问再刷新
+            if self.cookie:
+                inject_cookies(driver, self.cookie, SITE_DOMAIN)
             
-            # 1. 直接访问中转页
+            # 1. 直接访问中转页, 等待下载按钮出现
             self.progress.emit(f"访问中转页: {transfer_url}")
             driver.get(transfer_url)
-            time.sleep(3)
-            
-            # 添加cookie
-            if self.cookie:
-                for cookie_item in self.cookie.split('; '):
-                    name, value = cookie_item.split('=', 1)
-                    driver.add_cookie({
-                        'name': name,
-                        'value': value,
-                        'domain': 'www.sanmoganme.com',
-                        'path': '/'
-                    })
-                driver.refresh()
-                time.sleep(3)
+            self.progress.emit("\n等待下载按钮...")
+            download_link = wait_for_selector(driver, "#download-page a.empty.button")
             
             # 2. 获取提取码和解压码
             try:
@@ -369,25 +405,14 @@ class SanmoSpider:
                 unzip_code = "XDGAME"
                 self.progress.emit("未找到解压码")
             
-            # 3. 获取并点击下载按钮
-            self.progress.emit("\n等待下载按钮...")
-            download_link = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "#download-page a.empty.button"))
-            )
-            
-            # 获取当前窗口句柄
-            current_window = driver.current_window_handle
-            
-            # 点击下载按钮
+            # 3. 点击下载按钮
+            old_handles = driver.window_handles
             self.progress.emit("\n点击下载按钮...")
             driver.execute_script("arguments[0].click();", download_link)
-            time.sleep(3)
             
-            # 切换到新窗口
-            for window_handle in driver.window_handles:
-                if window_handle != current_window:
-                    driver.switch_to.window(window_handle)
-                    break
+            # 切换到新窗口, 等它离开空白页
+            driver.switch_to.window(wait_for_new_window(driver, old_handles))
+            wait_for_url_change(driver, 'about:blank')
             
             # 获取最终URL
             final_url = driver.current_url
@@ -403,7 +428,6 @@ class SanmoSpider:
             if driver:
                 try:
                     driver.quit()
-                    time.sleep(1)
                 except:
                     pass
 
@@ -413,4 +437,6 @@ class SanmoSpider:
 
     def set_cookie(self, cookie):
         """设置cookie"""
-        self.cookie = cookie
\ No newline at end of file
+        self.cookie = cookie
+        self.http_client = None
+        self.transfer_resolver = None
\ No newline at end of file
@@ -0,0 +1,214 @@
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http_client import HttpClient
+from title_utils import split_title, best_match
+import settings
+import logging
+
+SEARCH_URL = 'https://store.steampowered.com/api/storesearch/'
+HEADER_URL = 'https://cdn.akamai.steamstatic.com/steam/apps/{appid}/header.jpg'
+
+def header_url(appid):
+    """由appid构造封面大图地址"""
+    return HEADER_URL.format(appid=appid)
+
+class SteamLookup:
+    """Steam封面查询服务
+
+    标题到appid的结果持久保存在 steam_appids.json, 找到的永久有效,
+    没找到的在 steam_negative_days 天后才重新查询。查询通过共享限速器并发进行。
+    缓存文件整体重写, 单个查询后最多每 steam_save_interval 秒写一次, 批量查询结束时
+    写一次, 剩余的修改由 flush 写入。
+    """
+    def __init__(self, cache_path=None, client=None):
+        self.cache_path = cache_path or settings.DATA_DIR / 'steam_appids.json'
+        self.client = client or HttpClient()
+        self.negative_ttl = settings.IMAGE_CONFIG['steam_negative_days'] * 24 * 3600
+        self.threshold = settings.IMAGE_CONFIG['steam_match_threshold']
+        self.save_interval = settings.IMAGE_CONFIG['steam_save_interval']
+        self.dirty = False  # 有尚未写入文件的查询结果
+        self.last_save = time.monotonic()
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger('spider')
+        self.cache = self.load_cache()
+
+    def load_cache(self):
+        """读取缓存, 首次使用时导入 steam_search_results.json 中已有的结果"""
+        if os.path.exists(self.cache_path):
+            try:
+                with open(self.cache_path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except Exception as e:
+                self.logger.error(f"读取Steam缓存失败: {e}")
+                return {}
+        return self.import_search_results(settings.BASE_DIR / 'steam_search_results.json')
+
+    def import_search_results(self, path):
+        """从旧的搜索结果文件导入已确认的封面"""
+        cache = {}
+        if not os.path.exists(path):
+            return cache
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                results = json.load(f)
+            for title, result in results.items():
+                cover_url = (result.get('details') or {}).get('cover_url', '')
+                match = re.search(r'/apps/(\d+)/', cover_url)
+                if match:
+                    cache[self.cache_key(title)] = {
+                        'appid': int(match.group(1)),
+                        'name': title,
+                        'time': time.time()
+                    }
+        except Exception as e:
+            self.logger.error(f"导入Steam搜索结果失败: {e}")
+        return cache
+
+    def save_cache(self):
+        """写入缓存文件"""
+        with self.lock:
+            data = json.dumps(self.cache, ensure_ascii=False, indent=2)
+            temp_path = f'{self.cache_path}.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(data)
+            os.replace(temp_path, self.cache_path)
+            self.dirty = False
+            self.last_save = time.monotonic()
+
+    def flush(self):
+        """写入尚未保存的查询结果"""
+        with self.lock:
+            dirty = self.dirty
+        if dirty:
+            self.save_cache()
+
+    def save_if_due(self):
+        """距上次写入超过 save_interval 时写入, 逐个查询时不会每次都重写整个文件"""
+        with self.lock:
+            due = self.dirty and time.monotonic() - self.last_save >= self.save_interval
+        if due:
+            self.save_cache()
+
+    @staticmethod
+    def cache_key(title):
+        """缓存键"""
+        return ' '.join(title.lower().split())
+
+    def cached(self, title):
+        """读取缓存, 返回 (是否命中, 图片URL)"""
+        with self.lock:
+            entry = self.cache.get(self.cache_key(title))
+        if not entry:
+            return False, None
+        if entry['appid']:
+            return True, header_url(entry['appid'])
+        # 没找到的结果过期后重新查询
+        if time.time() - entry['time'] < self.negative_ttl:
+            return True, None
+        return False, None
+
+    def search(self, term, lang):
+        """调用Steam商店搜索接口, 返回结果列表"""
+        response = self.client.get(SEARCH_URL, params={'term': term, 'l': lang, 'cc': 'CN'})
+        response.raise_for_status()
+        return response.json().get('items', [])
+
+    def get_search_titles(self, title):
+        """依次尝试的 (搜索词, 语言): 中文名优先, 其次英文名"""
+        chinese, english = split_title(title)
+        terms = []
+        if chinese:
+            terms.append((chinese, 'schinese'))
+        if english:
+            terms.append((english, 'english'))
+        return terms
+
+    def find_game(self, title):
+        """联网查询, 返回与标题最匹配的搜索结果或None
+
+        每次搜索的全部结果都与中文名和英文名比较打分, 中文搜索没有足够相似的结果时
+        再用英文名搜索, 两次的结果一起比较。
+        """
+        items = []
+        for term, lang in self.get_search_titles(title):
+            items.extend(self.search(term, lang))
+            game, score = best_match(title, items, self.threshold)
+            if game:
+                print(f"匹配度 {score:.2f}: {title} -> {game['name']}")
+                return game
+        return None
+
+    def remember(self, title, game):
+        """记录查询结果, 没找到也记录"""
+        with self.lock:
+            self.cache[self.cache_key(title)] = {
+                'appid': game['id'] if game else None,
+                'name': game['name'] if game else '',
+                'time': time.time()
+            }
+            self.dirty = True
+
+    def fetch(self, title):
+        """联网查询并记录结果, 返回图片URL; 网络错误不记录, 下次重试"""
+        try:
+            game = self.find_game(title)
+        except Exception as e:
+            print(f"搜索失败: {title} {e}")
+            return None
+        self.remember(title, game)
+        if game:
+            print(f"找到游戏: {game['name']}")
+            return header_url(game['id'])
+        print(f"未找到游戏图片: {title}")
+        return None
+
+    def lookup(self, title):
+        """查询单个游戏的封面地址; 批量查询请用 lookup_many"""
+        hit, image_url = self.cached(title)
+        if hit:
+            return image_url
+        image_url = self.fetch(title)
+        self.save_if_due()
+        return image_url
+
+    def lookup_many(self, titles, max_workers=None):
+        """批量查询, 返回 {标题: 图片URL}; 只有未缓存的标题会联网"""
+        results = {}
+        missing = []
+        for title in titles:
+            hit, image_url = self.cached(title)
+            if hit:
+                results[title] = image_url
+            else:
+                missing.append(title)
+
+        if missing:
+            max_workers = max_workers or settings.SPIDER_CONFIG['max_workers']
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                for title, image_url in zip(missing, executor.map(self.fetch, missing)):
+                    results[title] = image_url
+            self.flush()
+        return results
+
+# 进程内共享的查询服务
+_steam_lookup = None
+_steam_lookup_lock = threading.Lock()
+
+def get_steam_lookup():
+    """获取共享的Steam封面查询服务"""
+    global _steam_lookup
+    with _steam_lookup_lock:
+        if _steam_lookup is None:
+            _steam_lookup = SteamLookup()
+        return _steam_lookup
+
+def close_steam_lookup():
+    """退出前写入共享查询服务尚未保存的结果, 未使用过时不做任何事"""
+    with _steam_lookup_lock:
+        lookup = _steam_lookup
+    if lookup is not None:
+        lookup.flush()
@@ -5,26 +5,13 @@ from selenium.webdriver.support import expected_conditions as EC
 import requests
 import os
 import time
-import re
+from title_utils import split_title
 
 def clean_title(title):
     """清理游戏标题"""
-    # 分离中英文标题
-    if '/' in title:
-        chinese, english = title.split('/', 1)
-    else:
-        chinese = english = title
-        
-    # 清理标题
-    chinese = re.sub(r'[【\[\(（].*?[】\]\)）]', '', chinese)
-    chinese = re.sub(r'\d{4}.*$', '', chinese)
-    chinese = chinese.strip()
-    
-    english = re.sub(r'[【\[\(（].*?[】\]\)）]', '', english)
-    english = re.sub(r'\d{4}.*$', '', english)
-    english = english.strip()
-    
-    return chinese, english
+    # 分离中英文标题, 缺少的一半用另一半代替
+    chinese, english = split_title(title)
+    return chinese or english, english or chinese
 
 def test_baidu_image_search(keyword):
     """测试百度图片搜索"""
@@ -0,0 +1,55 @@
+import pytest
+import settings
+from checkpoint import CheckpointJournal
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, 'DATA_DIR', tmp_path)
+    return tmp_path
+
+def test_append_and_load(data_dir):
+    """同一游戏多次写入以最后一次为准"""
+    journal = CheckpointJournal('test')
+    journal.append(1, {'title': 'a'})
+    journal.append('2', {'title': 'b'})
+    journal.append('1', {'title': 'c'})
+    assert CheckpointJournal('test').load() == {'1': {'title': 'c'}, '2': {'title': 'b'}}
+
+def test_repair_truncated_last_line(data_dir):
+    """崩溃时写了一半的最后一行在打开时截掉, 之后追加的记录不受影响"""
+    journal = CheckpointJournal('test')
+    journal.append('1', {'title': 'a'})
+    with open(journal.path, 'a', encoding='utf-8') as f:
+        f.write('{"id": "2", "result": {"tit')
+
+    journal = CheckpointJournal('test')
+    assert journal.path.read_bytes().endswith(b'\n')
+    assert journal.load() == {'1': {'title': 'a'}}
+    journal.append('3', {'title': 'c'})
+    assert journal.load() == {'1': {'title': 'a'}, '3': {'title': 'c'}}
+
+def test_repair_only_partial_line(data_dir):
+    """只有一行且不完整时清空"""
+    path = data_dir / 'checkpoints' / 'test.jsonl'
+    path.parent.mkdir(parents=True)
+    path.write_bytes(b'{"id": "1"')
+    journal = CheckpointJournal('test')
+    assert path.read_bytes() == b''
+    assert journal.load() == {}
+
+def test_skip_corrupt_line(data_dir):
+    """中间损坏的行跳过, 其余记录照常读取"""
+    journal = CheckpointJournal('test')
+    journal.append('1', {'title': 'a'})
+    with open(journal.path, 'a', encoding='utf-8') as f:
+        f.write('not json\n')
+    journal.append('2', {'title': 'b'})
+    assert journal.load() == {'1': {'title': 'a'}, '2': {'title': 'b'}}
+
+def test_clear(data_dir):
+    journal = CheckpointJournal('test')
+    journal.append('1', {'title': 'a'})
+    journal.clear()
+    assert not journal.path.exists()
+    assert journal.load() == {}
+    journal.clear()
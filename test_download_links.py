@@ -1,9 +1,8 @@
-from browser import Browser
+from browser import Browser, wait_for_selector, wait_for_new_window, wait_for_url_change
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-import time
 from selenium import webdriver
+from transfer_resolver import TransferResolver
+from netdisk import SITE_DOMAIN
 import json
 
 class DownloadLinkTest:
@@ -45,21 +44,33 @@ class DownloadLinkTest:
             print(f"创建浏览器失败: {e}")
             return False
         
-    def get_download_info(self, url):
-        """获取下载信息"""
+    def get_parallel_download_info(self, game_id, pan_types):
+        """并发HTTP解析所有网盘中转页, 返回已解析的结果"""
+        cookie = '; '.join(f"{cookie['name']}={cookie['value']}" for cookie in self.cookies)
+        resolver = TransferResolver(cookie=cookie, domain=SITE_DOMAIN)
+        transfer_urls = [
+            f"https://www.sanmoganme.com/download?post_id={game_id}&index=0&i={index}"
+            for _, index in pan_types
+        ]
+        
+        result = {}
+        for (pan_type, _), info in zip(pan_types, resolver.resolve_all(transfer_urls)):
+            if info:
+                print(f"获取到{pan_type}链接: {info['下载链接']}")
+                result[pan_type] = info['下载链接']
+                result.setdefault('提取码', info['提取码'])
+                result.setdefault('解压码', info['解压码'])
+        return result
+        
+    def get_download_info(self, url, parallel=True):
+        """获取下载信息, parallel 为 True 时先并发HTTP解析, 只有失败的网盘才使用浏览器"""
         try:
             print(f"开始获取下载信息: {url}")
             
-            # 初始化浏览器
-            if not self.init_browser():
-                raise Exception("初始化浏览器失败")
-                
             # 获取游戏ID
             game_id = url.split('/')[-1].replace('.html', '')
             print(f"游戏ID: {game_id}")
             
-            result = {}
-            
             # 定义所有网盘类型
             pan_types = [
                 ('baidu', 0),    # 百度网盘
@@ -70,9 +81,19 @@ class DownloadLinkTest:
                 ('123pan', 5)    # 123网盘
             ]
             
+            result = {}
+            if parallel:
+                result = self.get_parallel_download_info(game_id, pan_types)
+                pan_types = [(pan_type, index) for pan_type, index in pan_types if pan_type not in result]
+                if not pan_types:
+                    return result
+            
+            # 初始化浏览器
+            if not self.init_browser():
+                raise Exception("初始化浏览器失败")
+            
             # 先访问一次主页以设置cookie
             self.browser.get("https://www.sanmoganme.com")
-            time.sleep(1)
             
             # 添加cookie
             for cookie in self.cookies:
@@ -88,32 +109,26 @@ class DownloadLinkTest:
                     
                     # 访问中转页
                     self.browser.get(transfer_url)
-                    time.sleep(2)
                     
                     # 等待下载按钮出现并点击
                     try:
-                        download_btn = WebDriverWait(self.browser, 10).until(
-                            EC.element_to_be_clickable((By.CSS_SELECTOR, "a.empty.button"))
-                        )
+                        download_btn = wait_for_selector(self.browser, "a.empty.button", clickable=True)
                         
-                        # 点击按钮
+                        # 点击按钮, 等待新页面打开
+                        handles = self.browser.window_handles
                         download_btn.click()
-                        time.sleep(2)  # 等待新页面打开
                         
-                        # 获取所有窗口句柄
-                        handles = self.browser.window_handles
-                        if len(handles) > 1:
-                            # 切换到新窗口
-                            self.browser.switch_to.window(handles[-1])
-                            # 获取网盘链接
-                            pan_url = self.browser.current_url
-                            print(f"获取到{pan_type}链接: {pan_url}")
-                            result[pan_type] = pan_url
-                            
-                            # 关闭新窗口
-                            self.browser.close()
-                            # 切回主窗口
-                            self.browser.switch_to.window(handles[0])
+                        # 切换到新窗口
+                        self.browser.switch_to.window(wait_for_new_window(self.browser, handles))
+                        # 获取网盘链接
+                        pan_url = wait_for_url_change(self.browser, 'about:blank')
+                        print(f"获取到{pan_type}链接: {pan_url}")
+                        result[pan_type] = pan_url
+                        
+                        # 关闭新窗口
+                        self.browser.close()
+                        # 切回主窗口
+                        self.browser.switch_to.window(handles[0])
                             
                     except Exception as e:
                         print(f"获取{pan_type}链接失败: {str(e)}")
@@ -123,6 +138,9 @@ class DownloadLinkTest:
                     print(f"处理{pan_type}网盘失败: {str(e)}")
                     continue
             
+            if '提取码' in result:
+                return result
+                
             # 获取提取码和解压码
             try:
                 extract_code = self.browser.find_element(By.CSS_SELECTOR, "div.tqma span#tq").get_attribute('data-clipboard-text')
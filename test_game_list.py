@@ -0,0 +1,123 @@
+import json
+import sqlite3
+import pytest
+import settings
+from game_list import GameList, SCHEMA_MIGRATIONS
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, 'DATA_DIR', tmp_path)
+    return tmp_path
+
+def make_games(count=30):
+    """游戏1~count, 3的倍数已采集, 偶数有百度网盘链接, 5的倍数有图片"""
+    games = {}
+    for i in range(1, count + 1):
+        game = {
+            'title': f'Game {i}/游戏{i}',
+            'url': f'https://example.com/{i}.html',
+            'status': '已采集' if i % 3 == 0 else '未采集',
+            'add_time': f'2024-01-{i:02d} 00:00:00',
+        }
+        if i % 2 == 0:
+            game['百度网盘'] = f'https://pan.baidu.com/s/{i}'
+        if i % 5 == 0:
+            game['image_url'] = f'https://example.com/{i}.jpg'
+        games[str(i)] = game
+    return games
+
+@pytest.fixture
+def game_list(data_dir):
+    game_list = GameList('test')
+    game_list.upsert_many(make_games())
+    return game_list
+
+def ids(games):
+    return [game['id'] for game in games]
+
+def test_migrate_v1_to_latest(data_dir):
+    """旧版本数据库依次迁移, 从 data 中回填筛选字段和网盘表"""
+    conn = sqlite3.connect(str(data_dir / 'test.db'))
+    for statement in SCHEMA_MIGRATIONS[0]:
+        conn.execute(statement)
+    conn.execute('PRAGMA user_version = 1')
+    rows = [
+        ('1', 'Game 1', 'u1', '未采集', '', json.dumps({'add_time': '2024-01-01 00:00:00', '百度网盘': 'b1'}), ''),
+        ('2', 'Game 2', 'u2', '已采集', '', json.dumps({'天翼网盘': 't2', '百度网盘': ''}), 'https://example.com/2.jpg'),
+        ('3', 'Game 3', 'u3', '未采集', '', None, None),
+    ]
+    conn.executemany('INSERT INTO games VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+    conn.commit()
+    conn.close()
+
+    game_list = GameList('test')
+    conn = sqlite3.connect(str(data_dir / 'test.db'))
+    try:
+        assert conn.execute('PRAGMA user_version').fetchone()[0] == len(SCHEMA_MIGRATIONS)
+        assert conn.execute('SELECT id, add_time, has_image FROM games ORDER BY id').fetchall() == [
+            ('1', '2024-01-01 00:00:00', 0), ('2', '', 1), ('3', '', 0)
+        ]
+        assert sorted(conn.execute('SELECT pan, game_id FROM game_pans').fetchall()) == [
+            ('天翼网盘', '2'), ('百度网盘', '1')
+        ]
+    finally:
+        conn.close()
+
+    assert ids(game_list.page(filter={'pans': ['百度网盘']})) == ['1']
+    assert ids(game_list.page(filter={'has_image': True})) == ['2']
+    assert game_list.get_game('1')['百度网盘'] == 'b1'
+
+    # 已是最新版本时不再迁移
+    GameList('test')
+
+def test_page_order(game_list):
+    """默认按数字ID倒序, 不按字符串排序"""
+    assert ids(game_list.page(0, 5)) == ['30', '29', '28', '27', '26']
+    assert ids(game_list.page(25, 10)) == ['5', '4', '3', '2', '1']
+    assert ids(game_list.page(0, 3, order='asc')) == ['1', '2', '3']
+    assert game_list.page(30, 10) == []
+    assert len(game_list.page()) == 30
+    assert game_list.count() == 30
+
+def test_facets(game_list):
+    """状态、网盘、图片和时间范围条件组合, 分页和计数一致"""
+    filter = {'status': '已采集', 'pans': ['百度网盘']}
+    assert ids(game_list.page(filter=filter)) == ['30', '24', '18', '12', '6']
+    assert ids(game_list.page(1, 2, filter=filter)) == ['24', '18']
+    assert game_list.count(filter) == 5
+
+    assert ids(game_list.page(filter={'has_image': True, 'pans': ['百度网盘']})) == ['30', '20', '10']
+    assert game_list.count({'has_image': False}) == 24
+    assert ids(game_list.page(filter={'add_time': ('2024-01-28', None)})) == ['30', '29', '28']
+    assert game_list.count({'status': ['已采集', '未采集']}) == 30
+
+def test_facets_follow_updates(game_list):
+    """修改链接和图片后网盘表和筛选字段同步更新"""
+    game_list.upsert_game('2', {'百度网盘': '', 'image_url': 'https://example.com/2.jpg'})
+    assert '2' not in ids(game_list.page(filter={'pans': ['百度网盘']}))
+    assert '2' in ids(game_list.page(filter={'has_image': True}))
+    game_list.delete_game('30')
+    assert game_list.count({'pans': ['百度网盘']}) == 13
+
+def test_keyword_with_facets(game_list):
+    """关键字按相关度排序, 再按其余条件过滤"""
+    assert ids(game_list.page(filter={'keyword': 'game 12'})) == ['12']
+    assert ids(game_list.page(filter={'keyword': '游戏2'}))[:3] == ['29', '28', '27']
+    filter = {'keyword': 'game', 'status': '已采集'}
+    assert ids(game_list.page(0, 3, filter=filter)) == ['30', '27', '24']
+    assert game_list.count(filter) == 10
+
+def test_keyword_results_follow_changes(game_list):
+    """数据变化后缓存的搜索结果失效"""
+    filter = {'keyword': 'game', 'status': '已采集'}
+    assert game_list.count(filter) == 10
+    game_list.upsert_game('1', {'status': '已采集'})
+    assert game_list.count(filter) == 11
+    game_list.add_game('31', 'Game 31', 'u31', status='已采集')
+    assert ids(game_list.page(0, 1, filter=filter)) == ['31']
+
+def test_rows_of(game_list):
+    """游戏在当前条件下的行号"""
+    assert game_list.rows_of(['30', '1', '99']) == {'30': 0, '1': 29}
+    assert game_list.rows_of(['24', '12'], {'status': '已采集'}) == {'24': 2, '12': 6}
+    assert game_list.index_rows(['28']) == (30, {'28': 2})
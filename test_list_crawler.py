@@ -0,0 +1,77 @@
+import threading
+from list_crawler import ListCrawler
+
+class FakeResponse:
+    def __init__(self, status_code, text):
+        self.status_code = status_code
+        self.text = text
+
+class FakeClient:
+    """按页码返回固定内容, 记录请求过的页码"""
+    def __init__(self, pages, failed=()):
+        self.pages = pages
+        self.failed = set(failed)
+        self.requested = []
+        self.lock = threading.Lock()
+
+    def get(self, url):
+        page = int(url.rsplit('/', 1)[1])
+        with self.lock:
+            self.requested.append(page)
+        if page in self.failed:
+            return FakeResponse(500, '')
+        return FakeResponse(200, ','.join(self.pages.get(page, [])))
+
+def parse_page(text):
+    return [{'id': game_id, 'title': game_id} for game_id in text.split(',') if game_id]
+
+def make_crawler(client, max_workers=4):
+    return ListCrawler(client, lambda page: f'https://example.com/list/{page}', parse_page, max_workers)
+
+def ids(games):
+    return [game['id'] for game in games]
+
+# 列表按新到旧排列, 第3页开始是已有游戏
+PAGES = {
+    1: ['20', '19', '18'],
+    2: ['17', '16', '15'],
+    3: ['14', '13', '12'],
+    4: ['11', '10', '9'],
+    5: ['8', '7', '6'],
+    6: ['5', '4', '3'],
+}
+KNOWN = {str(i) for i in range(1, 15)}
+
+def test_crawl_keeps_page_order():
+    """并发抓取, 按页码顺序返回"""
+    games = make_crawler(FakeClient(PAGES)).crawl(1, 6)
+    assert ids(games) == [str(i) for i in range(20, 2, -1)]
+
+def test_stop_on_empty():
+    """遇到失败或空页停止, 不设置时跳过"""
+    client = FakeClient(PAGES, failed={3})
+    assert ids(make_crawler(client).crawl(1, 6, stop_on_empty=True)) == [str(i) for i in range(20, 14, -1)]
+    assert len(make_crawler(client).crawl(1, 6)) == 15
+
+def test_incremental_stop():
+    """连续 overlap 页全部是已知游戏时停止"""
+    games = make_crawler(FakeClient(PAGES)).crawl(1, 6, known_ids=KNOWN, overlap=1)
+    assert ids(games) == [str(i) for i in range(20, 11, -1)]
+
+    games = make_crawler(FakeClient(PAGES)).crawl(1, 6, known_ids=KNOWN, overlap=2)
+    assert ids(games) == [str(i) for i in range(20, 8, -1)]
+
+def test_incremental_partial_page_resets_overlap():
+    """部分已知的页不计入连续已知页数"""
+    # 第3页有一个新游戏, 第4、5页全部已知
+    known = KNOWN - {'13'}
+    games = make_crawler(FakeClient(PAGES)).crawl(1, 6, known_ids=known, overlap=2)
+    assert ids(games) == [str(i) for i in range(20, 5, -1)]
+
+def test_incremental_prefetch_near_boundary():
+    """整页新游戏时加倍预取, 出现已知游戏后回到逐页抓取, 停止时不多请求"""
+    client = FakeClient(PAGES)
+    known = KNOWN | {'16'}
+    games = make_crawler(client, max_workers=4).crawl(1, 6, known_ids=known, overlap=1)
+    assert ids(games) == [str(i) for i in range(20, 11, -1)]
+    assert sorted(client.requested) == [1, 2, 3]
@@ -0,0 +1,75 @@
+from search_index import SearchIndex, segments
+
+TITLES = {
+    '1': '艾尔登法环/Elden Ring',
+    '2': '巫师3：狂猎/The Witcher 3: Wild Hunt',
+    '5': '黑暗之魂3/Dark Souls III',
+    '9': 'Witchr Hunters',
+    '12': '圆环之理/Ring of Reason',
+    '20': '法环模拟器/Ring Simulator',
+}
+
+def make_index(titles=TITLES):
+    index = SearchIndex()
+    for game_id, title in titles.items():
+        index.add(game_id, title)
+    return index
+
+def test_segments():
+    """按中英文名和常见分隔符切分, 统一大小写和全角"""
+    assert segments('巫师3：狂猎/The Witcher 3') == ['巫师3', '狂猎', 'the', 'witcher', '3']
+    assert segments('ＲＩＮＧ') == ['ring']
+
+def test_exact_before_fuzzy():
+    """直接包含查询的排在前面, 错字匹配在后, 同分时新游戏在前"""
+    index = make_index()
+    assert index.search('witcher') == ['2', '9']
+    assert index.search('ring') == ['20', '12', '1']
+
+def test_typo_tolerance():
+    """较长的分段允许部分二元组不命中"""
+    index = make_index()
+    assert index.search('eldne ring') == ['1']
+    # 二元组命中比例高的在前
+    assert index.search('witchre') == ['9', '2']
+    # 只有两个二元组的分段要求全部命中
+    assert index.search('rig') == []
+
+def test_chinese_and_single_char():
+    """中文名按二元组匹配, 单字查询返回包含该字的游戏"""
+    index = make_index()
+    assert index.search('法环') == ['20', '1']
+    assert index.search('环') == ['20', '12', '1']
+    assert index.search('狂') == ['2']
+
+def test_every_segment_must_match():
+    """每个分段都要命中, 含单字分段时不做模糊匹配"""
+    index = make_index()
+    assert index.search('ring 法') == ['20', '1']
+    assert index.search('witchre 3') == []
+    assert index.search('dark souls') == ['5']
+
+def test_limit():
+    index = make_index()
+    assert index.search('ring', limit=2) == ['20', '12']
+    assert index.search('ring') == ['20', '12', '1']
+
+def test_cache_invalidated_on_change():
+    """新增、修改和删除后缓存的查询结果失效"""
+    index = make_index()
+    assert index.search('ring') == ['20', '12', '1']
+    index.add('30', 'Ring Fit')
+    assert index.search('ring') == ['30', '20', '12', '1']
+    index.add('30', 'Fit Adventure')
+    assert index.search('ring') == ['20', '12', '1']
+    index.remove('20')
+    assert index.search('ring') == ['12', '1']
+    assert index.search('环') == ['12', '1']
+    assert len(index) == 6
+
+def test_cached_result_is_a_copy():
+    """修改返回的列表不影响缓存"""
+    index = make_index()
+    result = index.search('ring')
+    result.clear()
+    assert index.search('ring') == ['20', '12', '1']
@@ -2,7 +2,8 @@ import requests
 import json
 import os
 import time
-from urllib.parse import quote
+from steam_lookup import get_steam_lookup
+from title_utils import split_title
 
 class SteamImageTest:
     """Steam游戏封面获取类"""
@@ -13,70 +14,21 @@ class SteamImageTest:
         })
         
     def get_search_title(self, title):
-        """获取搜索用的标题"""
-        # 如果包含斜杠，分别尝试中文和英文部分
-        if '/' in title:
-            cn_title, en_title = title.split('/', 1)
-            # 优先使用中文标题
-            if cn_title.strip():
-                return cn_title.strip()
-            # 如果中文为空，使用英文标题
-            return en_title.strip()
-        
-        # 如果没有斜杠，直接使用完整标题
-        return title.strip()
+        """获取搜索用的标题, 优先使用中文名"""
+        chinese, english = split_title(title)
+        return chinese or english
         
     def search_game(self, title):
-        """搜索游戏并返回图片URL"""
-        try:
-            search_title = self.get_search_title(title)
-            print(f"使用标题搜索: {search_title}")
-            
-            # 使用Steam Store API搜索
-            url = f"https://store.steampowered.com/api/storesearch/?term={quote(search_title)}&l=schinese&cc=CN"
-            response = self.session.get(url, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
-            if data['total'] > 0:
-                game = data['items'][0]  # 获取第一个结果
-                print(f"找到游戏: {game['name']}")
-                
-                # 获取游戏详情页
-                app_id = game['id']
-                
-                # 构造正确的图片URL
-                image_url = f"https://cdn.akamai.steamstatic.com/steam/apps/{app_id}/header.jpg"
-                print(f"找到游戏大图URL: {image_url}")
-                return image_url
-            
-            # 如果中文搜索失败，尝试英文搜索
-            if '/' in title:
-                en_title = title.split('/', 1)[1].strip()
-                print(f"尝试使用英文标题搜索: {en_title}")
-                url = f"https://store.steampowered.com/api/storesearch/?term={quote(en_title)}&l=english&cc=CN"
-                response = self.session.get(url, timeout=10)
-                response.raise_for_status()
-                
-                data = response.json()
-                if data['total'] > 0:
-                    game = data['items'][0]
-                    print(f"找到游戏: {game['name']}")
-                    
-                    # 获取游戏详情页
-                    app_id = game['id']
-                    
-                    # 构造正确的图片URL
-                    image_url = f"https://cdn.akamai.steamstatic.com/steam/apps/{app_id}/header.jpg"
-                    print(f"找到游戏大图URL: {image_url}")
-                    return image_url
-                
-            print("未找到游戏图片")
-            return None
-            
-        except Exception as e:
-            print(f"搜索失败: {e}")
-            return None
+        """搜索游戏并返回图片URL, 查询结果由 steam_lookup 缓存; 多个标题请用 search_games"""
+        print(f"使用标题搜索: {self.get_search_title(title)}")
+        image_url = get_steam_lookup().lookup(title)
+        if image_url:
+            print(f"找到游戏大图URL: {image_url}")
+        return image_url
+
+    def search_games(self, titles):
+        """批量搜索, 返回 {标题: 图片URL}, 只有未查询过的标题会联网"""
+        return get_steam_lookup().lookup_many(titles)
 
 def test_search():
     """测试搜索功能"""
@@ -0,0 +1,49 @@
+from title_utils import normalize, compare_key, split_title, score_result, best_match
+import settings
+
+THRESHOLD = settings.IMAGE_CONFIG['steam_match_threshold']
+
+def test_normalize():
+    """去掉括号说明和版本号, 统一全角和大小写"""
+    assert normalize('【豪华中文】 Elden Ring v1.02.3 ') == 'elden ring'
+    assert normalize('ＥＬＤＥＮ　ＲＩＮＧ：') == 'elden ring'
+    assert normalize(None) == ''
+
+def test_compare_key():
+    """比较时忽略版本名称, 中文之间的空格"""
+    assert compare_key('ELDEN RING Deluxe Edition') == 'elden ring'
+    assert compare_key('赛博朋克 2077') == compare_key('赛博朋克2077')
+
+def test_split_title():
+    """拆分中英文名, 忽略附加说明分段"""
+    assert split_title('艾尔登法环/Elden Ring/支持网络联机') == ('艾尔登法环', 'elden ring')
+    assert split_title('Elden Ring/艾尔登法环') == ('艾尔登法环', 'elden ring')
+    assert split_title('只有中文名') == ('只有中文名', '')
+
+def test_score_result():
+    """同名和版本名称不同的结果满分, 续作和原声低于阈值"""
+    title = '艾尔登法环/Elden Ring'
+    assert score_result(title, 'ELDEN RING') == 1.0
+    assert score_result(title, 'ELDEN RING Deluxe Edition') == 1.0
+    assert score_result(title, 'Elden Ring Nightreign') < THRESHOLD
+    # 标题没有提到的原声扣分, 标题本身是原声时不扣
+    assert score_result(title, 'ELDEN RING Soundtrack') < THRESHOLD
+    assert score_result('Elden Ring Soundtrack', 'ELDEN RING Soundtrack') == 1.0
+    assert score_result('黑暗之魂3/Dark Souls III', 'DARK SOULS™ III') >= THRESHOLD
+
+def test_best_match():
+    """选出最匹配的结果, 都低于阈值时返回None"""
+    items = [{'name': 'ELDEN RING Soundtrack'}, {'name': 'ELDEN RING'}, {'name': 'Elden Ring Nightreign'}]
+    game, score = best_match('艾尔登法环/Elden Ring', items, THRESHOLD)
+    assert game == {'name': 'ELDEN RING'}
+    assert score == 1.0
+
+    game, score = best_match('艾尔登法环/Elden Ring', [{'name': 'Hollow Knight'}], THRESHOLD)
+    assert game is None
+    assert score < THRESHOLD
+
+def test_best_match_keeps_order_on_tie():
+    """分数相同时保留搜索结果原有的顺序"""
+    items = [{'name': 'Elden Ring', 'id': 1}, {'name': 'ELDEN RING', 'id': 2}]
+    game, _ = best_match('Elden Ring', items, THRESHOLD)
+    assert game['id'] == 1
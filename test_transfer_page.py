@@ -1,6 +1,5 @@
 import undetected_chromedriver as uc
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+from browser import inject_cookies, wait_for_selector, wait_for_new_window, wait_for_url_change, wait_for_network_idle
 from selenium.webdriver.common.by import By
 import time
 import pandas as pd
@@ -26,23 +25,14 @@ def test_transfer_button(transfer_url, cookie=None):
         
         driver = uc.Chrome(options=options)
         
+        # 添加cookie, 打开页面前注入
+        if cookie:
+            inject_cookies(driver, cookie, 'www.sanmoganme.com')
+        
         # 1. 直接访问中转页
         print(f"访问中转页: {transfer_url}")
         driver.get(transfer_url)
-        time.sleep(3)
-        
-        # 添加cookie
-        if cookie:
-            for cookie_item in cookie.split('; '):
-                name, value = cookie_item.split('=', 1)
-                driver.add_cookie({
-                    'name': name,
-                    'value': value,
-                    'domain': 'www.sanmoganme.com',
-                    'path': '/'
-                })
-            driver.refresh()
-            time.sleep(3)
+        wait_for_network_idle(driver)
         
         # 2. 获取提取码和解压码
         try:
@@ -61,27 +51,22 @@ def test_transfer_button(transfer_url, cookie=None):
         
         # 3. 获取并点击下载按钮
         print("\n等待下载按钮...")
-        download_link = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "#download-page a.empty.button"))
-        )
+        download_link = wait_for_selector(driver, "#download-page a.empty.button")
         
         # 显示下载按钮的href属性
         href = download_link.get_attribute('href')
         print(f"下载按钮href: {href}")
         
         # 获取当前窗口句柄
-        current_window = driver.current_window_handle
+        old_handles = driver.window_handles
         
         # 点击下载按钮
         print("\n点击下载按钮...")
         driver.execute_script("arguments[0].click();", download_link)
-        time.sleep(3)
         
-        # 切换到新窗口
-        for window_handle in driver.window_handles:
-            if window_handle != current_window:
-                driver.switch_to.window(window_handle)
-                break
+        # 切换到新窗口, 等它离开空白页
+        driver.switch_to.window(wait_for_new_window(driver, old_handles))
+        wait_for_url_change(driver, 'about:blank')
         
         # 获取最终URL
         final_url = driver.current_url
@@ -0,0 +1,90 @@
+import re
+import unicodedata
+from difflib import SequenceMatcher
+
+# 括号内的附加说明: 【豪华中文】 [v1.2] (Build 123) 等
+BRACKET_PATTERN = re.compile(r'[【\[\(（].*?[】\]\)）]')
+# 版本号: v1.2.3 / ver 2.0 / build 1234 / 1.0.2
+VERSION_PATTERN = re.compile(r'\b(?:v|ver\.?|version|build)\s*\d[\w.\-]*|\b\d+(?:\.\d+){2,}\b', re.I)
+# 版本名称, 只用于比较, 搜索时保留
+EDITION_PATTERN = re.compile(
+    r'\b(?:digital\s+)?(?:deluxe|definitive|ultimate|gold|complete|goty|game of the year|'
+    r'enhanced|remastered|special|standard|premium|anniversary|collector\'?s?)\s+edition\b|\bgoty\b|'
+    r'(?:数字)?(?:豪华|决定|终极|黄金|完全|完整|年度|增强|重制|周年|典藏|标准)版'
+)
+# 整段都是附加说明的分段, 如 "支持网络联机"
+NOTE_PATTERN = re.compile(r'^(?:支持)?(?:网络|局域网|本地)?联机.*$|^.*(?:中文|汉化)版?$|^全dlc.*$|^免安装.*$', re.I)
+# 不是游戏本体的搜索结果
+EXTRA_PATTERN = re.compile(r'\b(?:soundtrack|ost|dlc|artbook|art book|season pass|demo|toolkit|dedicated server)\b|原声|配乐|季票|试玩版|画集')
+CJK_PATTERN = re.compile(r'[一-鿿]')
+PUNCT_PATTERN = re.compile(r'[^\w\s]|_')
+
+def normalize(text):
+    """统一全角半角、大小写和标点, 去掉括号说明和版本号"""
+    text = unicodedata.normalize('NFKC', text or '').lower()
+    text = text.replace('’', "'").replace('‘', "'").replace('–', '-').replace('—', '-')
+    text = BRACKET_PATTERN.sub(' ', text)
+    text = VERSION_PATTERN.sub(' ', text)
+    return ' '.join(text.split()).strip(' -:')
+
+def compare_key(text):
+    """用于比较的标题: 在 normalize 基础上去掉版本名称和标点"""
+    text = EDITION_PATTERN.sub(' ', normalize(text))
+    text = PUNCT_PATTERN.sub(' ', text)
+    # 中文之间不保留空格, "赛博朋克 2077" 和 "赛博朋克2077" 视为相同
+    text = re.sub(r'(?<=[一-鿿])\s+|\s+(?=[一-鿿])', '', ' '.join(text.split()))
+    return text
+
+def has_cjk(text):
+    """是否包含中文"""
+    return bool(CJK_PATTERN.search(text))
+
+def split_title(title):
+    """拆分 "中文名/English Name" 形式的标题, 返回 (中文名, 英文名), 缺少的部分为空字符串
+
+    顺序不限, 附加说明分段(如 "支持网络联机")会被忽略, 有多个别名时取第一个。
+    """
+    chinese = english = ''
+    for part in title.split('/'):
+        part = normalize(part)
+        if not part or NOTE_PATTERN.match(part):
+            continue
+        if has_cjk(part):
+            chinese = chinese or part
+        elif re.search(r'[a-z0-9]', part):
+            english = english or part
+    return chinese, english
+
+def similarity(a, b):
+    """两个标题的相似度, 0~1"""
+    a, b = compare_key(a), compare_key(b)
+    if not a or not b:
+        return 0.0
+    if a == b:
+        return 1.0
+    return SequenceMatcher(None, a, b).ratio()
+
+def score_result(title, name):
+    """搜索结果名称与游戏标题的匹配分, 分别与中文名和英文名比较取较高者
+
+    游戏标题没有提到的原声、DLC等附加内容扣分。
+    """
+    chinese, english = split_title(title)
+    score = max(similarity(chinese, name), similarity(english, name))
+    if EXTRA_PATTERN.search(normalize(name)) and not EXTRA_PATTERN.search(normalize(title)):
+        score -= 0.3
+    return score
+
+def best_match(title, items, threshold):
+    """从搜索结果中选出最匹配的一项, 返回 (结果, 分数), 都低于阈值时结果为None
+
+    分数相同时保留搜索结果原有的顺序。
+    """
+    best, best_score = None, 0.0
+    for item in items:
+        score = score_result(title, item['name'])
+        if score > best_score:
+            best, best_score = item, score
+    if best_score < threshold:
+        return None, best_score
+    return best, best_score
@@ -0,0 +1,128 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlparse
+from bs4 import BeautifulSoup
+from http_client import HttpClient, HostRateLimiter
+import settings
+
+DEFAULT_EXTRACT_CODE = "无"
+DEFAULT_UNZIP_CODE = "XDGAME"
+
+class TransferResolver:
+    """中转页 /download?post_id=...&i=... 的HTTP解析器
+
+    直接读取中转页HTML中的下载按钮地址和提取码/解压码,
+    站内跳转地址通过跟随重定向得到网盘地址。解析失败返回None, 由调用方回退到浏览器。
+    中转页请求使用单独的限速配额(transfer_rate_limit / transfer_rate_burst),
+    与列表页、详情页共用连接池但不共用令牌桶。
+    """
+    def __init__(self, cookie=None, client=None, domain=None):
+        client = client or HttpClient(cookie=cookie, domain=domain)
+        self.client = client.with_rate_limiter(get_transfer_rate_limiter())
+
+    def resolve(self, transfer_url):
+        """解析中转页, 返回 {'下载链接', '提取码', '解压码'} 或 None"""
+        try:
+            response = self.client.get(transfer_url)
+            if response.status_code != 200:
+                print(f"获取中转页失败，状态码: {response.status_code}")
+                return None
+
+            # 中转页本身被重定向到网盘
+            if not self.is_same_site(response.url, transfer_url):
+                return {
+                    '下载链接': response.url,
+                    '提取码': DEFAULT_EXTRACT_CODE,
+                    '解压码': DEFAULT_UNZIP_CODE
+                }
+
+            soup = BeautifulSoup(response.text, 'html.parser')
+            download_url = self.get_download_url(soup, transfer_url)
+            if not download_url:
+                return None
+
+            return {
+                '下载链接': download_url,
+                '提取码': self.get_code(soup, "div.tqma span#tq", DEFAULT_EXTRACT_CODE),
+                '解压码': self.get_code(soup, "div.tqma span#jy", DEFAULT_UNZIP_CODE)
+            }
+
+        except Exception as e:
+            print(f"HTTP解析中转页失败: {e}")
+            return None
+
+    def resolve_all(self, transfer_urls):
+        """并发解析多个中转页, 按输入顺序返回结果列表
+
+        并发数不超过中转页的突发配额, 更多的线程只会在令牌桶上等待。
+        """
+        if not transfer_urls:
+            return []
+        max_workers = min(len(transfer_urls), settings.SPIDER_CONFIG['transfer_rate_burst'])
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(self.resolve, transfer_urls))
+
+    def get_code(self, soup, selector, default):
+        """读取提取码/解压码"""
+        element = soup.select_one(selector)
+        if element and element.get('data-clipboard-text'):
+            return element['data-clipboard-text']
+        return default
+
+    def get_download_url(self, soup, transfer_url):
+        """读取下载按钮地址, 站内地址跟随重定向"""
+        link = soup.select_one("#download-page a.empty.button")
+        if not link:
+            # 没有下载按钮, 通常是未登录或需要JS渲染
+            return None
+
+        href = (link.get('href') or '').strip()
+        if not href or href.startswith(('#', 'javascript')):
+            return None
+
+        href = urljoin(transfer_url, href)
+        if self.is_same_site(href, transfer_url):
+            return self.follow_redirects(href, transfer_url)
+        return href
+
+    def follow_redirects(self, url, transfer_url):
+        """跟随站内跳转, 只读取最终地址不下载内容"""
+        response = self.client.get(url, allow_redirects=True, stream=True)
+        try:
+            if response.status_code < 400 and not self.is_same_site(response.url, transfer_url):
+                return response.url
+            return None
+        finally:
+            response.close()
+
+    @staticmethod
+    def is_same_site(url, other):
+        """两个地址是否同一站点"""
+        return urlparse(url).netloc == urlparse(other).netloc
+
+# 中转页共用的限速器
+_transfer_rate_limiter = None
+_transfer_rate_limiter_lock = threading.Lock()
+
+def get_transfer_rate_limiter():
+    """获取中转页限速器"""
+    global _transfer_rate_limiter
+    with _transfer_rate_limiter_lock:
+        if _transfer_rate_limiter is None:
+            _transfer_rate_limiter = HostRateLimiter(
+                settings.SPIDER_CONFIG['transfer_rate_limit'],
+                settings.SPIDER_CONFIG['transfer_rate_burst']
+            )
+        return _transfer_rate_limiter
+
+# 按cookie和域名复用解析器, 共享连接池
+_resolvers = {}
+_resolvers_lock = threading.Lock()
+
+def get_resolver(cookie=None, domain=None):
+    """获取共享的中转页解析器, cookie 只对 domain 站点发送"""
+    key = (cookie, domain)
+    with _resolvers_lock:
+        if key not in _resolvers:
+            _resolvers[key] = TransferResolver(cookie=cookie, domain=domain)
+        return _resolvers[key]